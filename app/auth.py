@@ -1,18 +1,75 @@
-from passlib.context import CryptContext
-from app.db import SessionLocal, User
+from app.db import User, session_scope
+from app.cache import TTLCache
+from app.hashing import hash_password, check_password, hashing_pool
 from datetime import datetime, timedelta
+import hashlib
+import os
+import time
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 
 
 SECRET_KEY = "iloveshrooms"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+# Jetons déjà vérifiés (empreinte SHA-256 -> username), chacun gardé jusqu'à son expiration
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+# Utilisateurs déjà chargés depuis la base (username -> User)
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1000"))
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def verify_token(token: str):
+    """Return the username of a valid token, or None. Verified tokens are cached until they expire."""
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    username = token_cache.get(digest)
+    if username is not None:
+        return username
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    username = payload.get("sub")
+    if username is None:
+        return None
+
+    exp = payload.get("exp")
+    ttl = exp - time.time() if exp is not None else token_cache.ttl
+    if ttl > 0:
+        token_cache.set(digest, username, ttl=ttl)
+    return username
+
+
+def get_user(username: str, db=None):
+    """Return the user with the given username, or None. Users are cached for USER_CACHE_TTL seconds.
+    On a cache miss, the user is loaded through `db` (e.g. the session of get_db) or a new session_scope()."""
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+
+    if db is not None:
+        user = db.query(User).filter(User.username == username).first()
+    else:
+        with session_scope() as db:
+            user = db.query(User).filter(User.username == username).first()
+    if user is not None:
+        user_cache.set(username, user)
+    return user
+
+
+def invalidate_user(username: str):
+    """Drop a user from the user cache after it changed in the database."""
+    user_cache.delete(username)
+
+
 def get_current_user(token: str = Depends(oauth2_scheme)):
     """Retrieve the current user based on JWT token."""
     credentials_exception = HTTPException(
@@ -20,17 +77,11 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
+    username = verify_token(token)
+    if username is None:
         raise credentials_exception
 
-    db = SessionLocal()
-    user = db.query(User).filter(User.username == username).first()
-    db.close()
+    user = get_user(username)
     if user is None:
         raise credentials_exception
     return user
@@ -47,24 +98,30 @@ def create_access_token(data: dict, expires_delta: int | None = None):
 
 def get_password_hash(password: str) -> str:
     """Return hashed version of the password."""
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify that the plain password matches the hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return check_password(plain_password, hashed_password)
+
+async def authenticate_user(username: str, password: str, db=None):
+    """Return the user if the credentials are valid, else None. argon2 runs in the hashing process pool,
+    which raises HashingPoolFull when saturated. `db` is passed to get_user."""
+    user = await run_in_threadpool(get_user, username, db)
+    if user is None or not await hashing_pool.verify(password, user.hashed_password):
+        return None
+    return user
 
 def create_user(username: str, password: str):
     """Create a new user in the database."""
-    db = SessionLocal()
-    existing_user = db.query(User).filter(User.username == username).first()
-    if existing_user:
-        db.close()
-        return existing_user
-    hashed = get_password_hash(password)
-    user = User(username=username, hashed_password=hashed)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    db.close()
+    with session_scope() as db:
+        existing_user = db.query(User).filter(User.username == username).first()
+        if existing_user:
+            return existing_user
+        hashed = get_password_hash(password)
+        user = User(username=username, hashed_password=hashed)
+        db.add(user)
+        db.flush()
+    invalidate_user(username)
     return user
 
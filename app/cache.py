@@ -0,0 +1,315 @@
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# -----------------------------
+# Spatial keys
+# -----------------------------
+
+def grid_cell(lat, lon, size):
+    """
+    Snaps coordinates to the center of their `size` x `size` degrees grid cell.
+    Every point of a cell gets the same key, which can also be used as coordinates.
+    param lat: Latitude of the location
+    param lon: Longitude of the location
+    param size: Cell size in degrees
+    """
+    return (
+        round((math.floor(lat / size) + 0.5) * size, 6),
+        round((math.floor(lon / size) + 0.5) * size, 6),
+    )
+
+# -----------------------------
+# In-memory LRU cache with TTL
+# -----------------------------
+
+class TTLCache:
+    """
+    Bounded in-memory cache. Entries expire after `ttl` seconds and the least recently used
+    entry is evicted once `maxsize` is reached. Hits and misses are counted for monitoring.
+    Expired entries are kept `stale_ttl` more seconds so that lookup() can serve them as stale.
+    Safe to share between the event loop and threadpool workers.
+    """
+
+    def __init__(self, maxsize, ttl, stale_ttl=0):
+        """
+        param maxsize: Maximum number of entries
+        param ttl: Default lifetime of an entry in seconds
+        param stale_ttl: Time in seconds an expired entry can still be served as stale
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key, default=None):
+        """
+        Returns a (value, stale) pair: stale is True for an expired entry still within `stale_ttl`.
+        Returns (default, False) if the key is missing or too old.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] + self.stale_ttl <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default, False
+            self._data.move_to_end(key)
+            if entry[0] <= now:
+                self.stale_hits += 1
+                return entry[1], True
+            self.hits += 1
+            return entry[1], False
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value, or `default` if the key is missing or expired.
+        """
+        value, stale = self.lookup(key, default)
+        if stale:
+            return default
+        return value
+
+    def expires_in(self, key):
+        """
+        Returns the seconds left before the entry expires (negative once stale), or None if it is missing.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        return entry[0] - time.monotonic()
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value for `ttl` seconds (defaults to the cache TTL).
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """
+        Removes an entry if present.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def stats(self):
+        """
+        Returns the size and hit/miss counters of the cache.
+        """
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+        }
+
+# -----------------------------
+# Persistent key/value cache (SQLite)
+# -----------------------------
+
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "./data/cache.db")
+
+
+class PersistentCache:
+    """
+    Key/value cache stored in a SQLite table, so entries survive restarts and are shared
+    by every uvicorn worker using the same file.
+    Values are stored as JSON. None is a legitimate value ("nothing found") and is kept
+    for `negative_ttl` seconds instead of `ttl`.
+    When `max_entries` is set, the entries closest to expiry are evicted once the table
+    grows past it (checked every EVICT_EVERY writes).
+    Expired entries are kept `stale_ttl` more seconds so that lookup() can serve them as stale.
+    Coroutines should write through aset(), which commits off the event loop. Reads use a connection
+    of their own, so they never wait for a write (and its evictions) to finish.
+    """
+
+    EVICT_EVERY = 64
+
+    def __init__(self, table, ttl, negative_ttl=None, path=None, max_entries=None, stale_ttl=0):
+        """
+        param table: Name of the SQLite table holding this cache
+        param ttl: Lifetime of an entry in seconds
+        param negative_ttl: Lifetime of a None entry in seconds (defaults to ttl)
+        param path: SQLite file path (defaults to CACHE_DB_PATH)
+        param max_entries: Maximum number of entries kept in the table (unbounded if None)
+        param stale_ttl: Time in seconds an expired entry can still be served as stale
+        """
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table!r}")
+        self.table = table
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.path = path or CACHE_DB_PATH
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._writes = 0
+        self._conn = None
+        self._lock = threading.Lock()
+        # Connexion de lecture séparée : en WAL, les lectures n'attendent pas une écriture en cours
+        self._reader = None
+        self._read_lock = threading.Lock()
+
+    def _connection(self):
+        # Connexion ouverte au premier usage : importer le module ne crée aucun fichier
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # En WAL, NORMAL ne synchronise le disque qu'aux checkpoints et non à chaque commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_expires_at ON {self.table} (expires_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _read_connection(self):
+        if self._reader is None:
+            # La table est créée par la connexion d'écriture
+            if self._conn is None:
+                with self._lock:
+                    self._connection()
+            self._reader = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        return self._reader
+
+    def _row(self, key):
+        with self._read_lock:
+            return self._read_connection().execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+    def get(self, key):
+        """
+        Returns a (hit, value) pair. Expired entries count as misses.
+        """
+        row = self._row(key)
+        if row is None or row[1] <= time.time():
+            return False, None
+        return True, json.loads(row[0])
+
+    def lookup(self, key):
+        """
+        Returns a (hit, value, stale) triple: stale is True for an expired entry still within `stale_ttl`.
+        """
+        row = self._row(key)
+        now = time.time()
+        if row is None or row[1] + self.stale_ttl <= now:
+            return False, None, False
+        return True, json.loads(row[0]), row[1] <= now
+
+    def expires_in(self, key):
+        """
+        Returns the seconds left before the entry expires (negative once stale), or None if it is missing.
+        """
+        row = self._row(key)
+        if row is None:
+            return None
+        return row[1] - time.time()
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value. None values use the negative TTL unless `ttl` is given.
+        """
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time() + ttl)
+            )
+            self._writes += 1
+            if self.max_entries is not None and self._writes % self.EVICT_EVERY == 0:
+                self._evict(conn)
+            conn.commit()
+
+    async def aset(self, key, value, ttl=None):
+        """
+        Same as set(), run in a worker thread so that the SQLite commit never blocks the event loop.
+        """
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def _evict(self, conn):
+        """
+        Deletes the entries closest to expiry until the table fits in max_entries.
+        """
+        excess = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY expires_at ASC LIMIT ?)",
+                (excess,)
+            )
+
+    def delete(self, key):
+        """
+        Removes an entry if present.
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            conn.commit()
+
+    def purge_expired(self):
+        """
+        Deletes every entry too old to be served, even as stale, and returns how many were removed.
+        """
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time() - self.stale_ttl,)
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def __len__(self):
+        with self._read_lock:
+            return self._read_connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,134 @@
+import os
+from collections import defaultdict
+
+from app.filter_engine import ColumnarFilter
+from app.responses import PrecomputedJSON
+from app.schemas import species_list
+from app.name_index import NameIndex
+from app.text_index import TextIndex
+
+# -----------------------------
+# In-memory species catalog
+# -----------------------------
+
+AQUATIC_SPECIES = {"psathyrella aquatica"}
+
+
+class SpeciesCatalog:
+    """
+    In-memory view of the cleaned mushrooms dataset.
+    The JSON file is parsed once and the indexes below are built up front, so lookups
+    on the request path never touch the disk.
+    """
+
+    def __init__(self, species):
+        """
+        param species: List of mushroom dicts as stored in mushrooms_cleaned.json
+        """
+        self.species = list(species)
+        self.by_scientific_name = {}
+        self.by_common_name = {}
+        self.by_season = defaultdict(list)
+        self.by_habitat = defaultdict(list)
+        self.aquatics = []
+        self._filter_engine = None
+        self._payload = None
+
+        for champ in self.species:
+            self.by_scientific_name[champ["scientific_name"].lower()] = champ
+            self.by_common_name.setdefault(champ["common_name"].lower(), champ)
+            for season in champ["season"]:
+                self.by_season[season].append(champ)
+            for habitat in champ["habitat"]:
+                self.by_habitat[habitat].append(champ)
+            if champ["scientific_name"].lower() in AQUATIC_SPECIES:
+                self.aquatics.append(champ)
+
+        self.names = NameIndex(self.species)
+        self.text_index = TextIndex(self.species)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Builds a catalog from a cleaned mushrooms JSON file.
+        Records are validated against the Species schema here, once, so the request path can
+        serialize them without validating them again. Raises pydantic.ValidationError on a bad record.
+        param path: Path to the cleaned mushrooms JSON file
+        """
+        with open(path, "rb") as f:
+            species = species_list.validate_json(f.read())
+        return cls(record.model_dump() for record in species)
+
+    def __len__(self):
+        return len(self.species)
+
+    def __iter__(self):
+        return iter(self.species)
+
+    @property
+    def filter_engine(self):
+        """
+        Columnar filter engine over the whole catalog, built on first use.
+        """
+        if self._filter_engine is None:
+            from app.shroomloc import HABITAT_COMPAT
+            self._filter_engine = ColumnarFilter(self.species, HABITAT_COMPAT)
+        return self._filter_engine
+
+    @property
+    def payload(self):
+        """
+        The whole catalog serialized once (with compressed variants and ETags), built on first use.
+        """
+        if self._payload is None:
+            self._payload = PrecomputedJSON(self.species)
+        return self._payload
+
+    def get_by_scientific_name(self, name):
+        """
+        Returns the mushroom with the given scientific name (case-insensitive), or None.
+        """
+        return self.by_scientific_name.get(name.lower())
+
+    def get_by_common_name(self, name):
+        """
+        Returns the mushroom with the given common name (case-insensitive), or None.
+        """
+        return self.by_common_name.get(name.lower())
+
+    def get_by_name(self, name):
+        """
+        Returns the mushroom with the given scientific or common name, ignoring case and accents, or None.
+        """
+        return self.names.lookup(name)
+
+    def search_names(self, prefix, limit=10):
+        """
+        Returns up to `limit` species whose scientific or common name (or one of its words) starts with `prefix`.
+        """
+        return self.names.prefix(prefix, limit)
+
+    def search_text(self, query, limit=20):
+        """
+        Returns up to `limit` (score, mushroom) pairs ranked by relevance to a free-text French query
+        over the notes, names and habitats.
+        """
+        return self.text_index.search(query, limit)
+
+
+_catalogs = {}
+
+
+def get_catalog(path):
+    """
+    Returns the catalog for the given JSON file, loading it on first use only.
+    Catalogs are shared per resolved path, so relative and absolute spellings of the
+    same file hit the same instance.
+    param path: Path to the cleaned mushrooms JSON file
+    """
+    key = os.path.realpath(path)
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        catalog = SpeciesCatalog.from_file(key)
+        _catalogs[key] = catalog
+    return catalog
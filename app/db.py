@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy import Column, Integer, String, create_engine, event, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, TimeoutError as PoolTimeoutError
+from contextlib import contextmanager
 
 import os
+import threading
+import time
 
 # regarde si la varible d'environnement DATABASE_URL est définie, sinon utilise une base de données SQLite locale
 if "DATABASE_URL" in os.environ:
@@ -11,9 +14,86 @@ if "DATABASE_URL" in os.environ:
 else:
     DATABASE_URL = "sqlite:///./data/shroomloc.db"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Dimensionnement du pool de connexions (connexions permanentes + débordement temporaire)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Attente maximale d'une connexion libre, en secondes
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Les connexions plus anciennes que DB_POOL_RECYCLE secondes sont rouvertes
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+# Mode de synchronisation SQLite (NORMAL est sûr en mode WAL)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+
+
+def create_db_engine(url):
+    """Create the engine for the given URL: pooled connections sized from the environment,
+    and WAL journal plus SQLITE_SYNCHRONOUS pragmas on each new SQLite connection."""
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+
+    options = {"connect_args": {"check_same_thread": False}}
+    in_memory = make_url(url).database in (None, "", ":memory:")
+    if not in_memory:
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    sqlite_engine = create_engine(url, **options)
+
+    @event.listens_for(sqlite_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.close()
+
+    return sqlite_engine
+
+
+class PoolMetrics:
+    """Checkout wait times and timeouts of the connection pool, for /metrics."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def stats(self, pool):
+        stats = {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait": round(self.total_wait / self.checkouts, 6) if self.checkouts else None,
+            "max_wait": round(self.max_wait, 6),
+        }
+        # Seuls les pools à file (QueuePool) connaissent leur taille et leur occupation
+        for name in ("size", "checkedout", "checkedin", "overflow"):
+            if hasattr(pool, name):
+                stats[name] = getattr(pool, name)()
+        return stats
+
+
+engine = create_db_engine(DATABASE_URL)
+# Les objets restent lisibles après le commit de session_scope (ils sont mis en cache par l'authentification)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
+pool_metrics = PoolMetrics()
 
 class User(Base):
     __tablename__ = "users"
@@ -21,17 +101,43 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
 
+@contextmanager
+def session_scope():
+    """Yield a session holding a pooled connection; commit on success, rollback on error, always close."""
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        db.connection()
+    except PoolTimeoutError:
+        pool_metrics.record(time.perf_counter() - start, timed_out=True)
+        db.close()
+        raise
+    pool_metrics.record(time.perf_counter() - start)
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def get_db():
+    """FastAPI dependency yielding a request-scoped session (see session_scope)."""
+    with session_scope() as db:
+        yield db
+
+def get_pool_stats():
+    """Return the pool occupancy and checkout wait times."""
+    return pool_metrics.stats(engine.pool)
+
 def init_db():
     Base.metadata.create_all(bind=engine)
 
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         from app.auth import create_user
         if not db.query(User).filter(User.username == "admin").first():
             create_user("admin", "password123")
             print("Admin user created")
         else:
             print("Admin user already exists")
-    finally:
-        db.close()
-
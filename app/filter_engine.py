@@ -0,0 +1,168 @@
+import numpy as np
+
+# -----------------------------
+# Columnar filter engine
+# -----------------------------
+
+WORD_BITS = 64
+
+
+def _vocabulary(values):
+    """
+    Returns a {value: bit position} mapping for the given values, in first-seen order.
+    """
+    index = {}
+    for value in values:
+        index.setdefault(value, len(index))
+    return index
+
+
+def _words(vocabulary):
+    """
+    Returns the number of 64-bit words needed to hold one bit per vocabulary entry.
+    """
+    return max(1, -(-len(vocabulary) // WORD_BITS))
+
+
+def _mask(values, vocabulary, n_words):
+    """
+    Encodes a collection of values as a row of uint64 words. Unknown values are ignored.
+    """
+    row = np.zeros(n_words, dtype=np.uint64)
+    for value in values:
+        bit = vocabulary.get(value)
+        if bit is not None:
+            row[bit // WORD_BITS] |= np.uint64(1) << np.uint64(bit % WORD_BITS)
+    return row
+
+
+def _encode(rows, vocabulary, n_words):
+    """
+    Encodes one collection of values per species as a (n_species, n_words) bitmask array.
+    """
+    bits = np.zeros((len(rows), n_words), dtype=np.uint64)
+    for i, values in enumerate(rows):
+        bits[i] = _mask(values, vocabulary, n_words)
+    return bits
+
+
+class ColumnarFilter:
+    """
+    Column-oriented copy of a species list for fast environmental filtering.
+    Temperatures and humidity are stored as float arrays, seasons and habitats as
+    bitmasks, and the HABITAT_COMPAT closure as one precomputed habitat mask per
+    biotope, so a filter is a handful of vectorized comparisons.
+    """
+
+    def __init__(self, species, habitat_compat):
+        """
+        param species: List of mushroom dicts with keys 'min_temp', 'max_temp', 'min_humidity', 'season', 'habitat'
+        param habitat_compat: Mapping of species habitat -> list of compatible biotopes
+        """
+        self.species = list(species)
+
+        self.min_temp = np.array([c["min_temp"] for c in self.species], dtype=np.float64)
+        self.max_temp = np.array([c["max_temp"] for c in self.species], dtype=np.float64)
+        self.min_humidity = np.array([c["min_humidity"] for c in self.species], dtype=np.float64)
+
+        self.seasons = _vocabulary(s for c in self.species for s in c["season"])
+        self.season_words = _words(self.seasons)
+        self.season_bits = _encode([c["season"] for c in self.species], self.seasons, self.season_words)
+
+        self.habitats = _vocabulary(h for c in self.species for h in c["habitat"])
+        self.habitat_words = _words(self.habitats)
+        self.habitat_bits = _encode([c["habitat"] for c in self.species], self.habitats, self.habitat_words)
+
+        # Fermeture de compatibilité : pour chaque biotope, l'ensemble des habitats
+        # d'espèce qui l'acceptent (h == biotope ou biotope dans HABITAT_COMPAT[h])
+        biotopes = _vocabulary(
+            list(self.habitats) + [b for compat in habitat_compat.values() for b in compat]
+        )
+        self.biotopes = biotopes
+        self.compat_matrix = np.zeros((len(biotopes), self.habitat_words), dtype=np.uint64)
+        for biotope, row in biotopes.items():
+            accepting = [
+                h for h in self.habitats
+                if biotope == h or biotope in habitat_compat.get(h, [])
+            ]
+            self.compat_matrix[row] = _mask(accepting, self.habitats, self.habitat_words)
+
+    def __len__(self):
+        return len(self.species)
+
+    def season_mask(self, season):
+        """
+        Returns the season bitmask row for the given season (all zeros if unknown).
+        """
+        return _mask([season], self.seasons, self.season_words)
+
+    def habitat_mask(self, biotope):
+        """
+        Returns the mask of species habitats compatible with the given biotope (all zeros if unknown).
+        """
+        row = self.biotopes.get(biotope)
+        if row is None:
+            return np.zeros(self.habitat_words, dtype=np.uint64)
+        return self.compat_matrix[row]
+
+    def match(self, temperature, humidity, season, biotope):
+        """
+        Returns a boolean array telling which species match the given conditions.
+        param temperature: Current temperature
+        param humidity: Current humidity
+        param season: Current season (e.g., 'spring', 'summer', 'autumn', 'winter')
+        param biotope: Current biotope (e.g., 'forêt de feuillus')
+        """
+        mask = (self.min_temp <= temperature) & (temperature <= self.max_temp)
+        mask &= self.min_humidity <= humidity
+        mask &= (self.season_bits & self.season_mask(season)).any(axis=1)
+        mask &= (self.habitat_bits & self.habitat_mask(biotope)).any(axis=1)
+        return mask
+
+    def filter(self, temperature, humidity, season, biotope):
+        """
+        Returns the species matching the given conditions, in catalog order.
+        """
+        indices = np.flatnonzero(self.match(temperature, humidity, season, biotope))
+        return [self.species[i] for i in indices]
+
+    def _columns(self, values, bits, mask_for):
+        """
+        Returns a (n_species, n_conditions) boolean matrix telling which species accept each value.
+        Each distinct value is evaluated once, then broadcast to the conditions using it.
+        """
+        distinct = {}
+        inverse = np.array([distinct.setdefault(v, len(distinct)) for v in values], dtype=np.intp)
+        masks = np.array([mask_for(v) for v in distinct], dtype=np.uint64).reshape(len(distinct), -1)
+        per_value = (bits[:, None, :] & masks[None, :, :]).any(axis=2)
+        return per_value[:, inverse]
+
+    def match_batch(self, temperatures, humidities, seasons, biotopes):
+        """
+        Evaluates many conditions at once, with the same semantics as match().
+        Returns a boolean matrix of shape (n_species, n_conditions).
+        param temperatures: Sequence of temperatures, one per condition
+        param humidities: Sequence of humidities, one per condition
+        param seasons: Sequence of seasons, one per condition
+        param biotopes: Sequence of biotopes, one per condition
+        """
+        temperatures = np.asarray(temperatures, dtype=np.float64)
+        humidities = np.asarray(humidities, dtype=np.float64)
+        if not (len(temperatures) == len(humidities) == len(seasons) == len(biotopes)):
+            raise ValueError("All condition sequences must have the same length")
+        if len(temperatures) == 0:
+            return np.zeros((len(self.species), 0), dtype=bool)
+
+        matrix = (self.min_temp[:, None] <= temperatures) & (temperatures <= self.max_temp[:, None])
+        matrix &= self.min_humidity[:, None] <= humidities
+        matrix &= self._columns(seasons, self.season_bits, self.season_mask)
+        matrix &= self._columns(biotopes, self.habitat_bits, self.habitat_mask)
+        return matrix
+
+    def indices_batch(self, temperatures, humidities, seasons, biotopes):
+        """
+        Evaluates many conditions at once and returns, for each condition,
+        the array of matching species indices in catalog order.
+        """
+        matrix = self.match_batch(temperatures, humidities, seasons, biotopes)
+        return [np.flatnonzero(column) for column in matrix.T]
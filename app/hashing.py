@@ -0,0 +1,118 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+
+# -----------------------------
+# Password hashing (argon2) in a dedicated process pool
+# -----------------------------
+# argon2 est volontairement coûteux en CPU : on le sort du threadpool de FastAPI (et du GIL)
+# pour qu'une rafale de connexions ne ralentisse pas les autres endpoints.
+
+# Paramètres de coût argon2 (valeurs par défaut de passlib)
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+# Nombre de processus dédiés au hachage, et nombre maximal d'opérations en attente ou en cours
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(4 * HASH_WORKERS)))
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+
+
+def hash_password(password):
+    """
+    Returns the argon2 hash of a password (runs in the calling process).
+    """
+    return pwd_context.hash(password)
+
+
+def check_password(plain_password, hashed_password):
+    """
+    Returns True if the plain password matches the hash (runs in the calling process).
+    """
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashingPoolFull(Exception):
+    """Raised when the hashing pool already holds HASH_MAX_PENDING operations."""
+
+
+class HashingPool:
+    """
+    Runs password hashing and verification in a pool of worker processes.
+    At most `max_pending` operations are queued or running; further calls raise HashingPoolFull
+    at once instead of letting the queue (and the login latency) grow.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        """
+        param workers: Number of worker processes (defaults to HASH_WORKERS)
+        param max_pending: Max operations queued or running (defaults to HASH_MAX_PENDING)
+        """
+        self.workers = workers or HASH_WORKERS
+        self.max_pending = max_pending or HASH_MAX_PENDING
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor = None
+
+    def start(self):
+        """
+        Creates the worker processes ("spawn", so they do not inherit the server's threads and sockets).
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        """
+        Runs fn(*args) in a worker process and returns its result.
+        Raises HashingPoolFull if `max_pending` operations are already queued or running.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HashingPoolFull(f"{self.pending} opérations de hachage en attente")
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.start(), fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def hash(self, password):
+        return await self.run(hash_password, password)
+
+    async def verify(self, plain_password, hashed_password):
+        return await self.run(check_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        """
+        Stops the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+hashing_pool = HashingPool()
@@ -0,0 +1,132 @@
+import json
+import os
+
+import numpy as np
+
+# -----------------------------
+# Offline land cover raster
+# -----------------------------
+# Grille uint8 construite par utils/build_landcover_raster.py à partir d'un extrait OSM local.
+# Le fichier .npy est ouvert en memory-map : les pages sont partagées entre workers par le cache de l'OS.
+
+UNKNOWN = 0
+WATER = 1
+DECIDUOUS_FOREST = 2
+CONIFEROUS_FOREST = 3
+MIXED_FOREST = 4
+FOREST = 5
+MEADOW = 6
+URBAN = 7
+OTHER_LAND = 8
+
+CLASS_NAMES = {
+    UNKNOWN: "unknown",
+    WATER: "water",
+    DECIDUOUS_FOREST: "deciduous forest",
+    CONIFEROUS_FOREST: "coniferous forest",
+    MIXED_FOREST: "mixed forest",
+    FOREST: "forest",
+    MEADOW: "meadow",
+    URBAN: "urban",
+    OTHER_LAND: "other land",
+}
+
+# Biotope renvoyé pour chaque classe (mêmes valeurs que classify_biotopes côté Overpass)
+CLASS_BIOTOPES = {
+    DECIDUOUS_FOREST: "forêt de feuillus",
+    CONIFEROUS_FOREST: "forêt de conifères",
+    MIXED_FOREST: "forêt mixte",
+    FOREST: "forêt",
+    MEADOW: "prairie",
+    URBAN: "zones urbaines",
+}
+
+LEAF_TYPES = {
+    "broadleaved": DECIDUOUS_FOREST,
+    "needleleaved": CONIFEROUS_FOREST,
+    "mixed": MIXED_FOREST,
+}
+
+
+def classify_tags(tags):
+    """
+    Returns the land cover class code of an OSM area from its tags, or UNKNOWN if it is not land cover.
+    param tags: Dict of OSM tags
+    """
+    natural = tags.get("natural")
+    landuse = tags.get("landuse")
+
+    if natural == "water" or "water" in tags or landuse in ["reservoir", "basin"]:
+        return WATER
+    if natural in ["wood", "forest"] or landuse in ["forest", "wood"]:
+        return LEAF_TYPES.get(tags.get("leaf_type"), FOREST)
+    if landuse in ["meadow", "grassland", "pasture", "grass"] or natural == "grassland":
+        return MEADOW
+    if landuse in ["residential", "commercial"]:
+        return URBAN
+    if natural in ["scrub", "heath"] or landuse in ["farmland", "industrial", "orchard", "vineyard"]:
+        return OTHER_LAND
+    return UNKNOWN
+
+
+def metadata_path(path):
+    """
+    Returns the path of the JSON sidecar describing the raster stored at `path`.
+    """
+    return f"{path}.json"
+
+
+class LandcoverRaster:
+    """
+    Memory-mapped land cover grid. Cell (i, j) covers latitudes
+    [south + i * resolution, south + (i + 1) * resolution) and the same for longitudes from west.
+    """
+
+    def __init__(self, path):
+        """
+        param path: Path to the .npy grid written by utils/build_landcover_raster.py
+        """
+        with open(metadata_path(path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path = path
+        self.south = meta["south"]
+        self.west = meta["west"]
+        self.north = meta["north"]
+        self.east = meta["east"]
+        self.resolution = meta["resolution"]
+        self.grid = np.load(path, mmap_mode="r")
+
+    def class_at(self, lat, lon):
+        """
+        Returns the class code of the cell containing the point, or None if the point is outside the raster.
+        """
+        i = int((lat - self.south) // self.resolution)
+        j = int((lon - self.west) // self.resolution)
+        if not (0 <= i < self.grid.shape[0] and 0 <= j < self.grid.shape[1]):
+            return None
+        return int(self.grid[i, j])
+
+    def landcover(self, lat, lon):
+        """
+        Returns the land cover classification {"water": bool, "biotopes": [...]} of the point,
+        in the same format as get_landcover, or None if the point is outside the raster.
+        """
+        code = self.class_at(lat, lon)
+        if code is None:
+            return None
+        biotope = CLASS_BIOTOPES.get(code)
+        return {
+            "water": code == WATER,
+            "biotopes": [biotope] if biotope else [],
+        }
+
+
+def load_landcover_raster(path=None):
+    """
+    Opens the raster configured by LANDCOVER_RASTER, or returns None if offline mode is not configured.
+    param path: Raster path overriding the LANDCOVER_RASTER environment variable
+    """
+    path = path or os.getenv("LANDCOVER_RASTER")
+    if not path:
+        return None
+    return LandcoverRaster(path)
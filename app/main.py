@@ -1,42 +1,92 @@
-from fastapi import FastAPI, Query, HTTPException, Depends
+from fastapi import FastAPI, Query, HTTPException, Depends, Body, Request, Response
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Literal, Optional
+import orjson
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm import Session
 import urllib.parse
+import os
 
-from app.shroomloc import get_mushrooms, get_all_mushrooms, get_mushroom_details_by_name
-from app.auth import verify_password, create_access_token, get_current_user
-from app.db import SessionLocal, User, init_db
+from app.shroomloc import get_mushrooms, get_mushrooms_batch, stream_mushrooms, get_mushroom_details_by_name, search_mushroom_names, search_mushrooms_text, weather_cache, weather_breakers, revalidator, ENRICHMENTS
+from app.auth import authenticate_user, create_access_token, get_current_user, token_cache, user_cache
+from app.db import User, init_db, get_db, get_pool_stats
+from app.catalog import get_catalog
+from app.recipe_pool import recipe_pool
+from app.schemas import Coordinates, LocationResult, MushroomDetails, MushroomResult, NameMatch, Species, TextMatch
+from app.responses import FastJSONResponse
+from app.upstream import upstream
+from app.singleflight import flights
+from app.hashing import hashing_pool, HashingPoolFull
 
 init_db()
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the background tasks of the API."""
+    hashing_pool.start()
+    recipe_pool.start()
+    revalidator.start()
+    yield
+    await revalidator.stop()
+    await recipe_pool.stop()
+    await upstream.aclose()
+    hashing_pool.shutdown()
+
+
 app = FastAPI(
     title="ShroomLoc API",
     version="0.2.0",
-    description="Mushroom location and identification API"
+    description="Mushroom location and identification API",
+    lifespan=lifespan
 )
 
 BASE_DIR = Path(__file__).resolve().parent
 DATA_FILE = BASE_DIR / "mushrooms_cleaned.json"
+BATCH_MAX_POINTS = int(os.getenv("BATCH_MAX_POINTS", "500"))
+
+INCLUDE_QUERY = Query("image,recipe", description="Enrichments to fetch, comma-separated: image, recipe (empty for none)")
+FIELDS_QUERY = Query(None, description="Fields to return, comma-separated (all by default)")
+
+
+def parse_list(value: Optional[str], allowed, name: str, allow_empty: bool = True) -> Optional[List[str]]:
+    """Split a comma-separated query parameter and check its items (400 on an unknown one, or on none if not allowed)."""
+    if value is None:
+        return None
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    if not items and not allow_empty:
+        raise HTTPException(status_code=400, detail=f"Empty {name}")
+    unknown = [item for item in items if item not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {name}: {', '.join(unknown)}")
+    return items
+
+# Chargement unique du catalogue (et de son moteur de filtrage, et de sa réponse /mushrooms/all) au démarrage
+get_catalog(DATA_FILE).filter_engine
+get_catalog(DATA_FILE).payload
 
 @app.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    db = SessionLocal()
-    user = db.query(User).filter(User.username == form_data.username).first()
-    db.close()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    try:
+        user = await authenticate_user(form_data.username, form_data.password, db)
+    except HashingPoolFull:
+        raise HTTPException(status_code=503, detail="Too many concurrent logins, retry later", headers={"Retry-After": "1"})
+    if user is None:
         raise HTTPException(status_code=401, detail="Invalid username or password")
     token = create_access_token({"sub": user.username})
 
     return {"access_token": token, "token_type": "bearer"}
 
-@app.get("/mushrooms", response_model=List[Dict])
-def mushrooms(
+@app.get("/mushrooms", response_model=List[MushroomResult], response_class=FastJSONResponse)
+async def mushrooms(
     latitude: float = Query(..., ge=-90, le=90),
     longitude: float = Query(..., ge=-180, le=180),
+    include: str = INCLUDE_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
     current_user: User = Depends(get_current_user)
-) -> List[Dict]:
+) -> FastJSONResponse:
     """
     Return a list of mushrooms filtered by environmental conditions
     at the given latitude and longitude.
@@ -44,38 +94,182 @@ def mushrooms(
     Args:
         latitude (float): Latitude of the location (-90 to 90)
         longitude (float): Longitude of the location (-180 to 180)
+        include (str): Enrichments to fetch (image, recipe); the others cost no upstream call
+        fields (str): Fields of each mushroom to return (all by default)
 
     Returns:
-        List[Dict]: List of mushrooms with scientific name, common name,
+        List[MushroomResult]: List of mushrooms with scientific name, common name,
                     edibility, and image URL.
     """
-    return get_mushrooms(latitude, longitude, DATA_FILE)
+    return FastJSONResponse(await get_mushrooms(
+        latitude, longitude, DATA_FILE,
+        include=parse_list(include, ENRICHMENTS, "include"),
+        fields=parse_list(fields, MushroomResult.model_fields, "fields", allow_empty=False),
+    ))
+
+
+@app.post("/mushrooms/batch", response_model=List[LocationResult], response_class=FastJSONResponse)
+async def mushrooms_batch(
+    points: List[Coordinates] = Body(..., min_length=1, max_length=BATCH_MAX_POINTS),
+    current_user: User = Depends(get_current_user)
+) -> FastJSONResponse:
+    """
+    Return the mushrooms for many locations at once (e.g. points along a trail).
+    Weather and land cover are fetched once per grid cell and the filter runs once per
+    distinct set of conditions, so nearby points cost almost nothing.
+
+    Args:
+        points (List[Coordinates]): Locations, at most BATCH_MAX_POINTS.
+
+    Returns:
+        List[LocationResult]: For each point, in order, its latitude, longitude and list of mushrooms.
+    """
+    return FastJSONResponse(await get_mushrooms_batch([(p.latitude, p.longitude) for p in points], DATA_FILE))
 
 
-@app.get("/mushrooms/all", response_model=List[Dict])
-def list_all_mushrooms(current_user: User = Depends(get_current_user)) -> List[Dict]:
+@app.get("/mushrooms/all", response_model=List[Species])
+def list_all_mushrooms(request: Request, current_user: User = Depends(get_current_user)) -> Response:
     """
     Return the full list of mushrooms from the dataset.
+    The body is serialized and compressed once per dataset version and sent with a strong ETag;
+    a request whose If-None-Match matches it gets an empty 304.
 
     Returns:
-        List[Dict]: List of all mushrooms with their properties.
+        Response: List of all mushrooms with their properties (gzip/brotli when accepted).
     """
-    return get_all_mushrooms()
+    return get_catalog(DATA_FILE).payload.response(request)
+
+@app.get("/mushrooms/stream")
+async def mushrooms_stream(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    format: Literal["ndjson", "sse"] = Query("ndjson", description="ndjson (one JSON object per line) or sse (server-sent events)"),
+    include: str = INCLUDE_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Stream the mushrooms of GET /mushrooms, each one as soon as its image and recipe are fetched.
+    Every event is {"index": position in the /mushrooms list, "mushroom": record}; with sse, an
+    "end" event with the number of mushrooms closes the stream.
+
+    Args:
+        latitude (float): Latitude of the location (-90 to 90)
+        longitude (float): Longitude of the location (-180 to 180)
+        format (str): ndjson or sse
+        include (str): Enrichments to fetch (image, recipe)
+        fields (str): Fields of each mushroom to return (all by default)
 
-@app.get("/mushrooms/{name}", response_model=Dict)
-def get_mushroom_by_name(name: str, current_user: User = Depends(get_current_user)) -> Dict:
+    Returns:
+        StreamingResponse: application/x-ndjson or text/event-stream body.
+    """
+    records = stream_mushrooms(
+        latitude, longitude, DATA_FILE,
+        include=parse_list(include, ENRICHMENTS, "include"),
+        fields=parse_list(fields, MushroomResult.model_fields, "fields", allow_empty=False),
+    )
+
+    async def ndjson():
+        async for index, record in records:
+            yield orjson.dumps({"index": index, "mushroom": record}) + b"\n"
+
+    async def sse():
+        count = 0
+        async for index, record in records:
+            count += 1
+            yield b"event: mushroom\ndata: " + orjson.dumps({"index": index, "mushroom": record}) + b"\n\n"
+        yield b"event: end\ndata: " + orjson.dumps({"count": count}) + b"\n\n"
+
+    if format == "sse":
+        return StreamingResponse(sse(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@app.get("/mushrooms/search", response_model=List[NameMatch], response_class=FastJSONResponse)
+def search_mushrooms(
+    prefix: str = Query(..., min_length=1, description="Beginning of a scientific or common name"),
+    limit: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+) -> FastJSONResponse:
+    """
+    Autocomplete mushroom names: species whose scientific or common name, or one of its words,
+    starts with the given prefix. Case and accents are ignored.
+
+    Args:
+        prefix (str): Beginning of a name, e.g. "cep" or "bord"
+        limit (int): Maximum number of matches (1 to 100)
+
+    Returns:
+        List[NameMatch]: Matching names, full-name matches first.
+    """
+    return FastJSONResponse(search_mushroom_names(prefix, DATA_FILE, limit))
+
+
+@app.get("/mushrooms/fulltext", response_model=List[TextMatch], response_class=FastJSONResponse)
+def fulltext_mushrooms(
+    q: str = Query(..., min_length=1, description="Words to look for, e.g. \"bois mort comestible\""),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+) -> FastJSONResponse:
+    """
+    Search the notes, names and habitats of the catalog for free French text.
+    Case, accents, stopwords and plurals are ignored; results are ranked with BM25.
+
+    Args:
+        q (str): Query text
+        limit (int): Maximum number of results (1 to 100)
+
+    Returns:
+        List[TextMatch]: Matching mushrooms with their score, best first.
+    """
+    return FastJSONResponse(search_mushrooms_text(q, DATA_FILE, limit))
+
+
+@app.get("/mushrooms/{name}", response_model=MushroomDetails, response_class=FastJSONResponse)
+async def get_mushroom_by_name(
+    name: str,
+    include: str = INCLUDE_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    current_user: User = Depends(get_current_user)
+) -> FastJSONResponse:
     """
     Return details of a specific mushroom by its scientific or common name.
 
     Args:
         name (str): Scientific or common name of the mushroom to search for.
+        include (str): Enrichments to fetch (image, recipe); the others cost no upstream call
+        fields (str): Fields to return (all by default)
     returns:
-        Dict: Details of the mushroom if found, otherwise an error message.
+        MushroomDetails: Details of the mushroom if found, otherwise an error message.
     """
     decoded_name = urllib.parse.unquote(name)
-    mushroom = get_mushroom_details_by_name(decoded_name)
-    if mushroom:
-        return mushroom
+    mushroom = await get_mushroom_details_by_name(
+        decoded_name, DATA_FILE,
+        include=parse_list(include, ENRICHMENTS, "include"),
+        fields=parse_list(fields, MushroomDetails.model_fields, "fields", allow_empty=False),
+    )
+    if mushroom is not None:
+        return FastJSONResponse(mushroom)
     else:
         raise HTTPException(status_code=404, detail="Mushroom not found")
 
+
+@app.get("/metrics", response_model=Dict)
+def metrics() -> Dict:
+    """
+    Return internal counters of the API (cache hit rates, ...).
+
+    Returns:
+        Dict: Metrics grouped by component.
+    """
+    return {
+        "weather_cache": weather_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "hashing_pool": hashing_pool.stats(),
+        "database_pool": get_pool_stats(),
+        "weather_providers": {name: breaker.stats() for name, breaker in weather_breakers.items()},
+        "coalescing": flights.stats(),
+        "revalidation": revalidator.stats(),
+        "upstream": upstream.stats()
+    }
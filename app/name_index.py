@@ -0,0 +1,90 @@
+import bisect
+import unicodedata
+
+# -----------------------------
+# Species name index (exact and prefix lookups)
+# -----------------------------
+
+
+def normalize(text):
+    """
+    Normalizes a name for lookups: casefolded, accents stripped, single spaces.
+    e.g. "  Cèpe de  Bordeaux" -> "cepe de bordeaux"
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split())
+
+
+class NameIndex:
+    """
+    Scientific and common names of the catalog, normalized with normalize().
+    Exact lookups go through a dict. Prefix lookups (autocomplete) bisect a sorted list of the
+    names, then a sorted list of the inner words of the names, so "bordeaux" finds "Cèpe de Bordeaux".
+    """
+
+    def __init__(self, species):
+        """
+        param species: List of mushroom dicts
+        """
+        by_kind = {"scientific_name": {}, "common_name": {}}
+        starts = []
+        words = []
+        for champ in species:
+            for kind in ("scientific_name", "common_name"):
+                name = champ[kind]
+                key = normalize(name)
+                if not key:
+                    continue
+                by_kind[kind].setdefault(key, champ)
+                starts.append((key, name, kind, champ))
+                position = key.find(" ")
+                while position != -1:
+                    words.append((key[position + 1:], name, kind, champ))
+                    position = key.find(" ", position + 1)
+
+        # Les noms scientifiques passent avant les noms communs en cas d'homonymie
+        self.exact = {**by_kind["common_name"], **by_kind["scientific_name"]}
+
+        sort_key = lambda entry: (entry[0], entry[1])
+        self._starts = sorted(starts, key=sort_key)
+        self._start_keys = [entry[0] for entry in self._starts]
+        self._words = sorted(words, key=sort_key)
+        self._word_keys = [entry[0] for entry in self._words]
+
+    def __len__(self):
+        return len(self.exact)
+
+    def lookup(self, name):
+        """
+        Returns the mushroom whose scientific or common name matches `name` once normalized, or None.
+        """
+        return self.exact.get(normalize(name))
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` matches {"name", "match", "scientific_name", "common_name"} for names starting
+        with `prefix`, then for names with a word starting with it. Each species appears once.
+        param prefix: Beginning of a name (case and accents are ignored)
+        param limit: Maximum number of matches
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        matches = []
+        seen = set()
+        for keys, entries in ((self._start_keys, self._starts), (self._word_keys, self._words)):
+            i = bisect.bisect_left(keys, prefix)
+            while i < len(keys) and keys[i].startswith(prefix) and len(matches) < limit:
+                _, name, kind, champ = entries[i]
+                if champ["scientific_name"] not in seen:
+                    seen.add(champ["scientific_name"])
+                    matches.append({
+                        "name": name,
+                        "match": kind,
+                        "scientific_name": champ["scientific_name"],
+                        "common_name": champ["common_name"],
+                    })
+                i += 1
+        return matches
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import random
+import time
+
+from app.upstream import upstream
+
+# -----------------------------
+# Local pool of mushroom recipes (TheMealDB)
+# -----------------------------
+
+MEALDB_FILTER_URL = "https://www.themealdb.com/api/json/v1/1/filter.php"
+MEALDB_LOOKUP_URL = "https://www.themealdb.com/api/json/v1/1/lookup.php"
+
+# Intervalle entre deux rafraîchissements du pool, en secondes
+RECIPE_POOL_REFRESH = float(os.getenv("RECIPE_POOL_REFRESH", str(6 * 3600)))
+# Nombre de fiches recettes téléchargées simultanément pendant un rafraîchissement
+RECIPE_POOL_CONCURRENCY = int(os.getenv("RECIPE_POOL_CONCURRENCY", "4"))
+
+
+def format_meal(meal_detail):
+    """
+    Converts a TheMealDB meal detail into the compact recipe dict returned by the API.
+    param meal_detail: One entry of the `meals` list of lookup.php
+    """
+    ingredients = []
+    for i in range(1, 21):
+        ing = meal_detail.get(f"strIngredient{i}")
+        qty = meal_detail.get(f"strMeasure{i}")
+        if ing and ing.strip():
+            ingredients.append(f"{(qty or '').strip()} {ing.strip()}".strip())
+
+    return {
+        "name": meal_detail["strMeal"],
+        "category": meal_detail["strCategory"],
+        "area": meal_detail["strArea"],
+        "instructions": meal_detail["strInstructions"],
+        "ingredients": ingredients,
+        "image": meal_detail["strMealThumb"],
+        "source": meal_detail.get("strSource") or "https://www.themealdb.com"
+    }
+
+
+async def fetch_mushroom_meal_ids():
+    """
+    Returns the ids of every TheMealDB meal containing mushrooms.
+    """
+    res = await upstream.get("mealdb", MEALDB_FILTER_URL, params={"i": "mushrooms"})
+    meals = res.json().get("meals") or []
+    return [meal["idMeal"] for meal in meals]
+
+
+async def fetch_meal(meal_id):
+    """
+    Returns the compact recipe dict of the given TheMealDB meal, or None if it does not exist.
+    """
+    res = await upstream.get("mealdb", MEALDB_LOOKUP_URL, params={"i": meal_id})
+    meals = res.json().get("meals")
+    if not meals:
+        return None
+    return format_meal(meals[0])
+
+
+class RecipePool:
+    """
+    In-memory pool of mushroom recipes, refreshed in the background.
+    Picking a recipe is a local random choice: no network call on the request path.
+    """
+
+    def __init__(self, refresh_interval=None, concurrency=None):
+        """
+        param refresh_interval: Seconds between two refreshes (defaults to RECIPE_POOL_REFRESH)
+        param concurrency: Concurrent lookup.php requests during a refresh (defaults to RECIPE_POOL_CONCURRENCY)
+        """
+        self.refresh_interval = refresh_interval or RECIPE_POOL_REFRESH
+        self.concurrency = concurrency or RECIPE_POOL_CONCURRENCY
+        self.recipes = []
+        self.refreshed_at = None
+        self._task = None
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def pick(self):
+        """
+        Returns a random recipe from the pool, or None if the pool is still empty.
+        """
+        if not self.recipes:
+            return None
+        return random.choice(self.recipes)
+
+    async def refresh(self):
+        """
+        Downloads the mushroom meal list and every meal detail, then swaps the pool in one go.
+        A failed or empty refresh keeps the previous pool.
+        Returns the number of recipes in the pool.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        meal_ids = await fetch_mushroom_meal_ids()
+
+        async def bounded_fetch(meal_id):
+            async with semaphore:
+                try:
+                    return await fetch_meal(meal_id)
+                except Exception as e:
+                    print(f"Erreur recette TheMealDB {meal_id}: {e}")
+                    return None
+
+        recipes = await asyncio.gather(*(bounded_fetch(meal_id) for meal_id in meal_ids))
+
+        recipes = [recipe for recipe in recipes if recipe is not None]
+        if recipes:
+            self.recipes = recipes
+            self.refreshed_at = time.time()
+        return len(self.recipes)
+
+    async def run(self):
+        """
+        Refreshes the pool forever, every `refresh_interval` seconds.
+        Retries sooner while the pool is still empty.
+        """
+        while True:
+            try:
+                count = await self.refresh()
+                print(f"Pool de recettes rafraîchi : {count} recettes")
+            except Exception as e:
+                print(f"Erreur rafraîchissement du pool de recettes: {e}")
+            await asyncio.sleep(self.refresh_interval if self.recipes else min(60, self.refresh_interval))
+
+    def start(self):
+        """
+        Starts the background refresh task on the running event loop.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """
+        Cancels the background refresh task.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+recipe_pool = RecipePool()
@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+# -----------------------------
+# Circuit breakers and hedged requests
+# -----------------------------
+
+
+class CircuitBreaker:
+    """
+    Skips a provider after `failure_threshold` consecutive failures.
+    The circuit then stays open for `reset_timeout` seconds. After that, a single trial call
+    is let through ("half-open"). It closes the circuit if it succeeds and reopens it otherwise.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=30):
+        """
+        param name: Provider name, for metrics
+        param failure_threshold: Consecutive failures opening the circuit
+        param reset_timeout: Seconds before a trial call is allowed on an open circuit
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.skipped = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        """
+        Returns True if a call may be sent to the provider now.
+        """
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        self.skipped += 1
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """
+        Forgets an allowed call that was cancelled before it could succeed or fail.
+        """
+        self.trial_in_flight = False
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "skipped": self.skipped,
+        }
+
+
+async def _guarded(breaker, coro_fn):
+    """
+    Awaits coro_fn() and reports the outcome to the breaker. Errors and None answers count as failures
+    and give None.
+    """
+    try:
+        result = await coro_fn()
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as e:
+        print(f"Fournisseur {breaker.name} en échec: {e!r}")
+        result = None
+
+    if result is None:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return result
+
+
+async def hedged(attempts, delay):
+    """
+    Returns the first valid (non-None) answer among several providers, or None if all fail.
+    The first provider whose circuit is closed is called at once. The next one is started when the
+    previous one fails, or after `delay` seconds without an answer (hedging). The calls still
+    running once an answer is found are cancelled.
+    param attempts: List of (CircuitBreaker, coroutine function) in order of preference
+    param delay: Seconds to wait for an answer before hedging with the next provider
+    """
+    # Les disjoncteurs ne sont consultés qu'au lancement de chaque tentative : un essai
+    # "half-open" ne doit pas être réservé pour un fournisseur qu'on n'appellera jamais
+    remaining = list(attempts)
+    pending = set()
+
+    try:
+        while remaining or pending:
+            while remaining:
+                breaker, coro_fn = remaining.pop(0)
+                if breaker.allow():
+                    pending.add(asyncio.ensure_future(_guarded(breaker, coro_fn)))
+                    break
+            if not pending:
+                return None
+
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=delay if remaining else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if task.result() is not None:
+                    return task.result()
+        return None
+
+    finally:
+        for task in pending:
+            task.cancel()
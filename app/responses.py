@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# -----------------------------
+# Fast JSON responses
+# -----------------------------
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson.
+    Meant for data that is already valid: catalog records (validated at load) and the dicts built
+    from them. Endpoints returning it skip FastAPI's response_model validation and jsonable_encoder.
+    """
+
+    def render(self, content):
+        return orjson.dumps(content)
+
+# -----------------------------
+# Precomputed static JSON responses
+# -----------------------------
+
+
+def accepted_encodings(request):
+    """
+    Returns the content codings accepted by the client (q=0 excluded), lowercased.
+    param request: Incoming request
+    """
+    encodings = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if coding:
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+class PrecomputedJSON:
+    """
+    A JSON document serialized once, with its gzip (and brotli, if installed) variants.
+    Each variant has its own strong ETag derived from the content hash. A request whose
+    If-None-Match holds one of them gets a 304 without any body.
+    """
+
+    def __init__(self, data):
+        """
+        param data: JSON-serializable document
+        """
+        body = orjson.dumps(data)
+        self.version = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(body)
+        self.etags = {
+            encoding: f'"{self.version}"' if encoding == "identity" else f'"{self.version}-{encoding}"'
+            for encoding in self.variants
+        }
+
+    def negotiate(self, request):
+        """
+        Returns the smallest variant accepted by the client ("identity" if none is).
+        """
+        accepted = accepted_encodings(request)
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def not_modified(self, request):
+        """
+        Returns True if the client already holds this version of the document.
+        If-None-Match uses the weak comparison (RFC 7232, section 3.2): a W/ prefix is ignored.
+        """
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or not tags.isdisjoint(self.etags.values())
+
+    def response(self, request):
+        """
+        Returns the response to send: 304 if the client's copy is current, else the negotiated variant.
+        param request: Incoming request
+        """
+        encoding = self.negotiate(request)
+        headers = {
+            "ETag": self.etags[encoding],
+            "Vary": "Accept-Encoding",
+            "Cache-Control": "private, no-cache",
+        }
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.variants[encoding], media_type="application/json", headers=headers)
@@ -0,0 +1,129 @@
+import asyncio
+import os
+from collections import Counter
+
+# -----------------------------
+# Stale-while-revalidate and proactive refresh of hot keys
+# -----------------------------
+
+# Intervalle entre deux passes de rafraîchissement proactif, en secondes
+REFRESH_INTERVAL = float(os.getenv("REFRESH_INTERVAL", "60"))
+# Nombre de clés les plus demandées examinées à chaque passe
+REFRESH_TOP = int(os.getenv("REFRESH_TOP", "50"))
+# Une clé chaude est rafraîchie quand elle expire dans moins de REFRESH_AHEAD secondes
+REFRESH_AHEAD = float(os.getenv("REFRESH_AHEAD", "120"))
+
+
+class Revalidator:
+    """
+    Refreshes cache entries in the background.
+    Stale entries served to a request are refreshed by revalidate() without making the request wait.
+    Requested keys are counted by touch(). The refresh loop refreshes the most requested ones shortly
+    before they expire, then halves the counts so that popularity follows recent traffic.
+    Refreshes go through the given SingleFlight, so they never duplicate a fetch already in flight.
+    """
+
+    def __init__(self, flights, interval=None, top=None, ahead=None):
+        """
+        param flights: SingleFlight shared with the request path
+        param interval: Seconds between two proactive passes (defaults to REFRESH_INTERVAL)
+        param top: Hottest keys examined per pass (defaults to REFRESH_TOP)
+        param ahead: Refresh a hot key expiring within this many seconds (defaults to REFRESH_AHEAD)
+        """
+        self.flights = flights
+        self.interval = interval or REFRESH_INTERVAL
+        self.top = top or REFRESH_TOP
+        self.ahead = REFRESH_AHEAD if ahead is None else ahead
+        self.requests = Counter()
+        self.jobs = {}
+        self.revalidated = 0
+        self.refreshed = 0
+        self._pending = set()
+        self._task = None
+
+    def touch(self, key, refresh, expires_in):
+        """
+        Counts a request on `key` and remembers how to refresh it.
+        param key: Key shared with the SingleFlight of the request path
+        param refresh: Coroutine function fetching and caching the entry
+        param expires_in: Function returning the seconds before the entry expires, or None if missing
+        """
+        self.requests[key] += 1
+        self.jobs[key] = (refresh, expires_in)
+
+    def revalidate(self, key, refresh):
+        """
+        Refreshes a stale entry in the background; returns at once.
+        """
+        task = asyncio.ensure_future(self.flights.do(key, refresh))
+        self._pending.add(task)
+        task.add_done_callback(self._done)
+        self.revalidated += 1
+
+    def _done(self, task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Erreur de revalidation en arrière-plan: {task.exception()!r}")
+
+    async def refresh_hot(self):
+        """
+        Refreshes the hottest keys expiring within `ahead` seconds (or already evicted), then decays the counts.
+        Returns the number of refreshed keys.
+        """
+        due = []
+        for key, _ in self.requests.most_common(self.top):
+            refresh, expires_in = self.jobs[key]
+            remaining = expires_in()
+            if remaining is None or remaining <= self.ahead:
+                due.append((key, refresh))
+
+        results = await asyncio.gather(
+            *(self.flights.do(key, refresh) for key, refresh in due), return_exceptions=True
+        )
+        for (key, _), result in zip(due, results):
+            if isinstance(result, Exception):
+                print(f"Erreur de rafraîchissement de {key}: {result!r}")
+        self.refreshed += len(due)
+
+        self.requests = Counter({key: count // 2 for key, count in self.requests.items() if count // 2})
+        self.jobs = {key: job for key, job in self.jobs.items() if key in self.requests}
+        return len(due)
+
+    async def run(self):
+        """
+        Runs a proactive refresh pass every `interval` seconds, forever.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh_hot()
+            except Exception as e:
+                print(f"Erreur de rafraîchissement proactif: {e}")
+
+    def start(self):
+        """
+        Starts the proactive refresh task on the running event loop.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """
+        Cancels the proactive refresh task and the background revalidations.
+        """
+        tasks = list(self._pending)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        return {
+            "tracked_keys": len(self.requests),
+            "revalidated": self.revalidated,
+            "proactively_refreshed": self.refreshed,
+            "pending": len(self._pending),
+        }
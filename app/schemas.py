@@ -0,0 +1,85 @@
+from typing import List, Literal, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+
+class Coordinates(BaseModel):
+    """A point given by its latitude and longitude."""
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+
+Season = Literal["winter", "spring", "summer", "autumn", "all year"]
+Edibility = Literal["edible", "inedible", "medicinal"]
+Toxicity = Literal["none", "not_toxic_not_edible", "unknown", "toxic", "poisonous", "deadly"]
+# Les températures du jeu de données sont entières : on ne les convertit pas en float
+Number = Union[int, float]
+
+
+class Species(BaseModel):
+    """A species record of the catalog, as stored in mushrooms_cleaned.json."""
+    model_config = ConfigDict(extra="allow")
+
+    scientific_name: str
+    common_name: str
+    edibility: Edibility
+    season: List[Season]
+    min_temp: Number
+    max_temp: Number
+    min_humidity: Number
+    habitat: List[str]
+    notes: str
+    toxicity: Toxicity
+    psychoactive: bool
+
+
+# Validation de tout le fichier en un seul appel, au chargement du catalogue
+species_list = TypeAdapter(List[Species])
+
+
+class Recipe(BaseModel):
+    """A mushroom recipe from TheMealDB."""
+    name: str
+    category: Optional[str] = None
+    area: Optional[str] = None
+    instructions: Optional[str] = None
+    ingredients: List[str]
+    image: Optional[str] = None
+    source: Optional[str] = None
+
+
+class MushroomResult(BaseModel):
+    """A mushroom found around a location, with its image and, if edible, a recipe."""
+    scientific_name: str
+    common_name: str
+    edibility: Edibility
+    toxicity: Toxicity
+    psychoactive: bool
+    image_url: Optional[str] = None
+    recipe: Optional[Recipe] = None
+
+
+class LocationResult(BaseModel):
+    """The mushrooms found around one point of a batch."""
+    latitude: float
+    longitude: float
+    mushrooms: List[MushroomResult]
+
+
+class NameMatch(BaseModel):
+    """An autocomplete match of a name prefix."""
+    name: str
+    match: Literal["scientific_name", "common_name"]
+    scientific_name: str
+    common_name: str
+
+
+class TextMatch(Species):
+    """A species matching a full-text query, with its relevance score."""
+    score: float
+
+
+class MushroomDetails(Species):
+    """A full species record with its image and, if edible, a recipe."""
+    image_url: Optional[str] = None
+    recipe: Optional[Recipe] = None
@@ -1,20 +1,32 @@
-import requests
+import asyncio
+import functools
+import httpx
 from datetime import datetime
+import math
 import random
 import os
-import json
+
+from app.cache import PersistentCache, TTLCache, grid_cell
+from app.catalog import SpeciesCatalog, get_catalog
+from app.filter_engine import ColumnarFilter
+from app.landcover_raster import load_landcover_raster
+from app.recipe_pool import recipe_pool, fetch_mushroom_meal_ids, fetch_meal
+from app.resilience import CircuitBreaker, hedged
+from app.singleflight import flights
+from app.revalidate import Revalidator
+from app.upstream import upstream
 
 # -----------------------------
 # 1. Mock of localisation
 # -----------------------------
 
-def get_approx_location():
+async def get_approx_location():
     """
     Returns an approximate latitude and longitude based on the user's IP address.
     If the IP-based location cannot be determined, returns default coordinates (Bois de Changé
     """
     try:
-        res = requests.get("https://ipinfo.io/json", timeout=5).json()
+        res = (await upstream.get("ipinfo", "https://ipinfo.io/json")).json()
         loc = res.get("loc", None)
         if loc:
             lat, lon = map(float, loc.split(","))
@@ -31,41 +43,113 @@ def get_approx_location():
 # -----------------------------
 # Utilisation de OpenWeatherMap (API gratuite nécessite une clé)
 
-def get_weather(lat, lon):
+# La météo est mise en cache par case de grille : les utilisateurs proches partagent la même entrée
+WEATHER_GRID_DEG = float(os.getenv("WEATHER_GRID_DEG", "0.05"))
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "900"))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "10000"))
+# Une météo expirée depuis moins de WEATHER_STALE_TTL secondes est servie pendant son rafraîchissement
+WEATHER_STALE_TTL = float(os.getenv("WEATHER_STALE_TTL", "900"))
+weather_cache = TTLCache(maxsize=WEATHER_CACHE_SIZE, ttl=WEATHER_CACHE_TTL, stale_ttl=WEATHER_STALE_TTL)
+
+# Rafraîchit en arrière-plan les entrées périmées et, avant expiration, les cases les plus demandées
+revalidator = Revalidator(flights)
+
+
+async def fetch_wttr(lat, lon):
     """
-    Returns the current temperature and humidity for the given latitude and longitude.
-    Tries multiple APIs for robustness. If all fail, returns default values.
+    Returns the current (temperature, humidity) from wttr.in.
+    """
+    url = f"https://wttr.in/{lat},{lon}?format=j1"
+    data = (await upstream.get("wttr", url)).json()
+    temp = float(data["current_condition"][0]["temp_C"])
+    hum = float(data["current_condition"][0]["humidity"])
+    return temp, hum
+
+
+async def fetch_open_meteo(lat, lon):
+    """
+    Returns the current (temperature, humidity) from Open-Meteo.
+    """
+    url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true&hourly=relativehumidity_2m"
+    data = (await upstream.get("open_meteo", url)).json()
+    temp = data["current_weather"]["temperature"]
+    hum = data["hourly"]["relativehumidity_2m"][0]
+    return temp, hum
+
+
+# Fournisseurs météo par ordre de préférence. Le suivant est interrogé en parallèle si le
+# précédent n'a pas répondu après WEATHER_HEDGE_DELAY secondes (≈ p95 de wttr.in).
+WEATHER_PROVIDERS = [
+    ("wttr", fetch_wttr),
+    ("open_meteo", fetch_open_meteo),
+]
+WEATHER_HEDGE_DELAY = float(os.getenv("WEATHER_HEDGE_DELAY", "1.0"))
+# Un fournisseur en échec WEATHER_BREAKER_THRESHOLD fois de suite est ignoré pendant WEATHER_BREAKER_COOLDOWN secondes
+WEATHER_BREAKER_THRESHOLD = int(os.getenv("WEATHER_BREAKER_THRESHOLD", "3"))
+WEATHER_BREAKER_COOLDOWN = float(os.getenv("WEATHER_BREAKER_COOLDOWN", "30"))
+weather_breakers = {
+    name: CircuitBreaker(name, WEATHER_BREAKER_THRESHOLD, WEATHER_BREAKER_COOLDOWN)
+    for name, _ in WEATHER_PROVIDERS
+}
+
+
+async def fetch_weather(lat, lon):
+    """
+    Queries the weather providers for the current temperature and humidity, bypassing the cache.
+    Providers are hedged: the next one is also queried if the previous one fails or is still silent
+    after WEATHER_HEDGE_DELAY seconds, and the first valid answer wins.
+    Providers whose circuit breaker is open are skipped. Returns None if all of them fail.
     param lat: Latitude of the location
     param lon: Longitude of the location
     """
-    
-    apis = [
-        "wttr", 
-        "open-meteo"
+    attempts = [
+        (weather_breakers[name], lambda fetch=fetch: fetch(lat, lon))
+        for name, fetch in WEATHER_PROVIDERS
     ]
-    
-    for api in apis:
-        try:
-            if api == "wttr":
-                url = f"https://wttr.in/{lat},{lon}?format=j1"
-                data = requests.get(url, timeout=5).json()
-                temp = float(data["current_condition"][0]["temp_C"])
-                hum = float(data["current_condition"][0]["humidity"])
-                return temp, hum
-
-            elif api == "open-meteo":
-                url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true&hourly=relativehumidity_2m"
-                data = requests.get(url, timeout=5).json()
-                temp = data["current_weather"]["temperature"]
-                hum = data["hourly"]["relativehumidity_2m"][0]
-                return temp, hum
+    return await hedged(attempts, WEATHER_HEDGE_DELAY)
 
-        except Exception as e:
-            continue
 
-    temp = 10.0
-    hum = 80.0
-    return temp, hum
+async def load_weather(cell, lat, lon):
+    """
+    Fetches the weather of a grid cell and caches it. Returns None (not cached) if all providers fail.
+    param cell: Grid cell of the location, as returned by grid_cell
+    param lat: Latitude of the location
+    param lon: Longitude of the location
+    """
+    weather = await fetch_weather(lat, lon)
+    if weather is not None:
+        weather_cache.set(cell, weather)
+    return weather
+
+
+async def get_weather(lat, lon):
+    """
+    Returns the current temperature and humidity for the given latitude and longitude.
+    Answers are cached per WEATHER_GRID_DEG grid cell for WEATHER_CACHE_TTL seconds, and concurrent
+    misses on the same cell share a single fetch. An answer expired for less than WEATHER_STALE_TTL
+    seconds is returned at once while it is refreshed in the background.
+    If all APIs fail, returns default values (which are not cached).
+    param lat: Latitude of the location
+    param lon: Longitude of the location
+    """
+    cell = grid_cell(lat, lon, WEATHER_GRID_DEG)
+    key = ("weather", cell)
+    refresh = functools.partial(load_weather, cell, lat, lon)
+    revalidator.touch(key, refresh, functools.partial(weather_cache.expires_in, cell))
+
+    weather, stale = weather_cache.lookup(cell)
+    if weather is not None:
+        if stale:
+            revalidator.revalidate(key, refresh)
+        return weather
+
+    weather = await flights.do(key, refresh)
+    if weather is None:
+        temp = 10.0
+        hum = 80.0
+        return temp, hum
+
+    return weather
 
 # -----------------------------
 # 3. Determination of the season
@@ -113,54 +197,268 @@ HABITAT_COMPAT = {
     "zones urbaines": ["zones urbaines", "lisière"],
 }
 
-def is_water(lat, lon):
-    overpass_url = "http://overpass-api.de/api/interpreter"
+OVERPASS_URL = "http://overpass-api.de/api/interpreter"
+
+# Rayon (m) dans lequel on cherche de la terre ferme pour décider si le point est dans l'eau
+WATER_RADIUS = 5000
+# Rayon (m) dans lequel l'occupation du sol détermine le biotope du point
+BIOTOPE_RADIUS = 50
+
+
+def classify_water(elements):
+    """
+    Decides whether a point is in water from the OSM landuse/natural elements around it.
+    No element at all, or water without any land, means water.
+    param elements: Overpass elements found within WATER_RADIUS
+    """
+    if not elements:
+        return True
+
+    has_water = False
+    has_land = False
+
+    for el in elements:
+        tags = el.get("tags", {})
+        natural = tags.get("natural")
+        landuse = tags.get("landuse")
+        water = tags.get("water")
+
+        if natural == "water" or water is not None:
+            has_water = True
+
+        if natural in ["wood", "forest", "scrub", "grassland"] or \
+           landuse in ["forest", "residential", "meadow", "farmland", "industrial", "commercial"]:
+            has_land = True
+
+    if has_water and not has_land:
+        return True
+
+    return False
+
+
+def classify_biotopes(elements):
+    """
+    Returns the biotope candidates ("forêt", "prairie", "zones urbaines") matching the given OSM elements.
+    param elements: Overpass elements found within BIOTOPE_RADIUS
+    """
+    biotope_candidates = []
+    for element in elements:
+        tags = element.get("tags", {})
+        if tags.get("natural") in ["wood", "forest"]:
+            biotope_candidates.append("forêt")
+        elif tags.get("landuse") in ["forest", "wood"]:
+            biotope_candidates.append("forêt")
+        elif tags.get("landuse") in ["meadow", "grassland", "pasture"]:
+            biotope_candidates.append("prairie")
+        elif tags.get("landuse") in ["residential", "commercial"]:
+            biotope_candidates.append("zones urbaines")
+    return biotope_candidates
+
+
+def pick_biotope(biotope_candidates):
+    """
+    Picks one biotope among the OSM candidates, or None if there are none.
+    A generic "forêt" is resolved to a random forest type.
+    param biotope_candidates: List returned by classify_biotopes
+    """
+    if biotope_candidates:
+        biotope = random.choice(biotope_candidates)
+        if biotope == "forêt":
+            biotope = random.choice([
+                "forêt de feuillus",
+                "forêt de conifères",
+                "forêt mixte"
+            ])
+        return biotope
+    return None
+
+
+# L'occupation du sol évolue sur des mois : elle est mise en cache par tuile, de façon persistante.
+# Le verdict "eau" (terre ferme à moins de WATER_RADIUS) varie peu d'un point à l'autre : il est
+# gardé par tuile de WATER_TILE_DEG (quelques km), le biotope par tuile de LANDCOVER_TILE_DEG.
+LANDCOVER_TILE_DEG = float(os.getenv("LANDCOVER_TILE_DEG", "0.001"))
+WATER_TILE_DEG = float(os.getenv("WATER_TILE_DEG", "0.02"))
+LANDCOVER_CACHE_TTL = float(os.getenv("LANDCOVER_CACHE_TTL", str(30 * 24 * 3600)))
+LANDCOVER_CACHE_MAX = int(os.getenv("LANDCOVER_CACHE_MAX", "200000"))
+WATER_CACHE_MAX = int(os.getenv("WATER_CACHE_MAX", "100000"))
+# Une tuile expirée depuis moins de LANDCOVER_STALE_TTL secondes est servie pendant son rafraîchissement
+LANDCOVER_STALE_TTL = float(os.getenv("LANDCOVER_STALE_TTL", str(7 * 24 * 3600)))
+# Budget global (s) d'une tuile manquante sur le chemin d'une requête, tentatives Overpass comprises
+LANDCOVER_TIMEOUT = float(os.getenv("LANDCOVER_TIMEOUT", "15"))
+biotope_cache = PersistentCache(
+    "biotopes", ttl=LANDCOVER_CACHE_TTL, max_entries=LANDCOVER_CACHE_MAX, stale_ttl=LANDCOVER_STALE_TTL
+)
+water_cache = PersistentCache(
+    "water", ttl=LANDCOVER_CACHE_TTL, max_entries=WATER_CACHE_MAX, stale_ttl=LANDCOVER_STALE_TTL
+)
+
+# Mode hors-ligne : grille locale (LANDCOVER_RASTER) consultée avant Overpass.
+# Avec LANDCOVER_OFFLINE=1, les points hors de la grille ne déclenchent pas non plus d'appel Overpass.
+LANDCOVER_OFFLINE = os.getenv("LANDCOVER_OFFLINE", "0").lower() in ("1", "true", "yes")
+landcover_raster = load_landcover_raster()
+
+METERS_PER_DEGREE = 111320
+
+
+def landcover_tile(lat, lon):
+    """
+    Returns the center of the LANDCOVER_TILE_DEG biotope tile containing the point, and its cache key.
+    param lat: Latitude of the location
+    param lon: Longitude of the location
+    """
+    tile = grid_cell(lat, lon, LANDCOVER_TILE_DEG)
+    return tile, f"{tile[0]},{tile[1]}"
+
+
+def water_tile(lat, lon):
+    """
+    Returns the center of the WATER_TILE_DEG water tile containing the point, and its cache key.
+    param lat: Latitude of the location
+    param lon: Longitude of the location
+    """
+    tile = grid_cell(lat, lon, WATER_TILE_DEG)
+    return tile, f"{tile[0]},{tile[1]}"
+
+
+def biotope_query_radius(lat):
+    """
+    Returns the radius (m) of the biotope query made at the center of a tile: BIOTOPE_RADIUS plus
+    the half-diagonal of the tile, so that the BIOTOPE_RADIUS disc of every point of the tile is covered.
+    param lat: Latitude of the tile center
+    """
+    half_height = LANDCOVER_TILE_DEG / 2 * METERS_PER_DEGREE
+    half_width = half_height * math.cos(math.radians(lat))
+    return BIOTOPE_RADIUS + math.ceil(math.hypot(half_height, half_width))
+
+
+async def fetch_water(lat, lon):
+    """
+    Decides from Overpass, bypassing the cache, whether the given point is in water
+    (see classify_water). Network errors are raised.
+    param lat: Latitude of the location
+    param lon: Longitude of the location
+    """
     query = f"""
     [out:json];
     (
-      way(around:5000,{lat},{lon})["landuse"];
-      way(around:5000,{lat},{lon})["natural"];
-      relation(around:5000,{lat},{lon})["landuse"];
-      relation(around:5000,{lat},{lon})["natural"];
+      way(around:{WATER_RADIUS},{lat},{lon})["landuse"];
+      way(around:{WATER_RADIUS},{lat},{lon})["natural"];
+      relation(around:{WATER_RADIUS},{lat},{lon})["landuse"];
+      relation(around:{WATER_RADIUS},{lat},{lon})["natural"];
     );
     out tags;
     """
-    try:
-        res = requests.get(overpass_url, params={"data": query}, timeout=15)
-        data = res.json()
-        elements = data.get("elements", [])
+    res = await upstream.get("overpass", OVERPASS_URL, params={"data": query})
+    res.raise_for_status()
+    return classify_water(res.json().get("elements", []))
+
+
+async def fetch_biotopes(lat, lon, radius=BIOTOPE_RADIUS):
+    """
+    Returns the biotope candidates around the given point from Overpass, bypassing the cache
+    (see classify_biotopes). Network errors are raised.
+    param lat: Latitude of the location
+    param lon: Longitude of the location
+    param radius: Search radius in meters
+    """
+    query = f"""
+    [out:json];
+    (
+      way(around:{radius},{lat},{lon})["landuse"];
+      way(around:{radius},{lat},{lon})["natural"];
+    );
+    out tags;
+    """
+    res = await upstream.get("overpass", OVERPASS_URL, params={"data": query})
+    res.raise_for_status()
+    return classify_biotopes(res.json().get("elements", []))
 
-        if not elements:
-            return True
 
-        has_water = False
-        has_land = False
+async def load_water(tile, key):
+    """
+    Fetches the water verdict of a water tile from Overpass and caches it. Errors are raised, not cached.
+    param tile: (lat, lon) center of the tile
+    param key: Cache key of the tile
+    """
+    water = await fetch_water(*tile)
+    await water_cache.aset(key, water)
+    return water
 
-        for el in elements:
-            tags = el.get("tags", {})
-            natural = tags.get("natural")
-            landuse = tags.get("landuse")
-            water = tags.get("water")
 
-            if natural == "water" or water is not None:
-                has_water = True
+async def load_biotopes(tile, key):
+    """
+    Fetches the biotope candidates of a biotope tile from Overpass and caches them. Errors are raised, not cached.
+    param tile: (lat, lon) center of the tile
+    param key: Cache key of the tile
+    """
+    biotopes = await fetch_biotopes(*tile, radius=biotope_query_radius(tile[0]))
+    await biotope_cache.aset(key, biotopes)
+    return biotopes
 
-            if natural in ["wood", "forest", "scrub", "grassland"] or \
-               landuse in ["forest", "residential", "meadow", "farmland", "industrial", "commercial"]:
-                has_land = True
 
-        if has_water and not has_land:
-            return True
+async def _cached_tile(kind, cache, tile, key, load, default):
+    """
+    Returns the cached value of a land cover tile, loading it on a miss. Concurrent misses share one
+    load, and a value expired for less than LANDCOVER_STALE_TTL seconds is returned while being refreshed.
+    On failure, `default` is returned and nothing is cached. A load taking more than LANDCOVER_TIMEOUT
+    seconds also gives `default`, but keeps running and fills the cache for the next requests.
+    """
+    flight_key = (kind, key)
+    refresh = functools.partial(load, tile, key)
+    revalidator.touch(flight_key, refresh, functools.partial(cache.expires_in, key))
 
-        if has_land and not has_water:
-            return False
+    hit, value, stale = cache.lookup(key)
+    if hit:
+        if stale:
+            revalidator.revalidate(flight_key, refresh)
+        return value
 
-        return False
+    try:
+        return await asyncio.wait_for(flights.do(flight_key, refresh), LANDCOVER_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f"Overpass ({kind}) trop lent pour {tile}, réponse par défaut")
+        return default
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"Erreur Overpass ({kind}) pour {tile}: {e}")
+        return default
 
-    except Exception:
-        return False
+
+async def get_landcover(lat, lon):
+    """
+    Returns the land cover classification {"water": bool, "biotopes": [...]} around the given point.
+    Points covered by the offline raster (LANDCOVER_RASTER) are answered by a direct array lookup.
+    Otherwise, both parts are fetched from Overpass and cached persistently for LANDCOVER_CACHE_TTL seconds:
+    the water verdict per WATER_TILE_DEG tile, computed at the tile center, and the biotope candidates
+    per LANDCOVER_TILE_DEG tile, searched at the tile center within a radius covering the
+    BIOTOPE_RADIUS disc of every point of the tile (so a few candidates may come from slightly further away).
+    On failure (or outside the raster in LANDCOVER_OFFLINE mode), the point is considered on land with
+    no candidate, and nothing is cached.
+    param lat: Latitude of the location
+    param lon: Longitude of the location
+    """
+    if landcover_raster is not None:
+        landcover = landcover_raster.landcover(lat, lon)
+        if landcover is not None:
+            return landcover
+    if LANDCOVER_OFFLINE:
+        return {"water": False, "biotopes": []}
+
+    water, biotopes = await asyncio.gather(
+        _cached_tile("water", water_cache, *water_tile(lat, lon), load_water, False),
+        _cached_tile("biotopes", biotope_cache, *landcover_tile(lat, lon), load_biotopes, []),
+    )
+    return {"water": water, "biotopes": biotopes}
 
 
+async def is_water(lat, lon):
+    """
+    Returns True if the given point is in water according to OpenStreetMap.
+    param lat: Latitude of the location
+    param lon: Longitude of the location
+    """
+    landcover = await get_landcover(lat, lon)
+    return landcover["water"]
+
 
 def determine_biotope(temperature, humidity, season):
     """
@@ -185,50 +483,14 @@ def determine_biotope(temperature, humidity, season):
         return "forêt de feuillus"
 
 
-def refine_biotope_osm(lat, lon):
+async def refine_biotope_osm(lat, lon):
     """
     Refines the biotope using OpenStreetMap data around the given latitude and longitude.
     param lat: Latitude of the location
     param lon: Longitude of the location
     """
-    overpass_url = "http://overpass-api.de/api/interpreter"
-    query = f"""
-    [out:json];
-    (
-      way(around:50,{lat},{lon})["landuse"];
-      way(around:50,{lat},{lon})["natural"];
-    );
-    out tags;
-    """
-    biotope_candidates = []
-    try:
-        response = requests.get(overpass_url, params={"data": query}, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            for element in data.get("elements", []):
-                tags = element.get("tags", {})
-                if tags.get("natural") in ["wood", "forest"]:
-                    biotope_candidates.append("forêt")
-                elif tags.get("landuse") in ["forest", "wood"]:
-                    biotope_candidates.append("forêt")
-                elif tags.get("landuse") in ["meadow", "grassland", "pasture"]:
-                    biotope_candidates.append("prairie")
-                elif tags.get("landuse") in ["residential", "commercial"]:
-                    biotope_candidates.append("zones urbaines")
-
-    except requests.exceptions.RequestException:
-        pass
-
-    if biotope_candidates:
-        biotope = random.choice(biotope_candidates)
-        if biotope == "forêt":
-            biotope = random.choice([
-                "forêt de feuillus",
-                "forêt de conifères",
-                "forêt mixte"
-            ])
-        return biotope
-    return None
+    landcover = await get_landcover(lat, lon)
+    return pick_biotope(landcover["biotopes"])
 
 
 # -----------------------------
@@ -238,35 +500,74 @@ def refine_biotope_osm(lat, lon):
 def filter_mushrooms(champignons, temperature, humidity, season, biotope):
     """
     Filters the list of mushrooms based on the given environmental conditions.
-    param champignons: List of mushroom dicts with keys 'min_temp', 'max_temp', 'min_humidity', 'season', 'habitat'
+    A species matches when the temperature is within [min_temp, max_temp], the humidity is at least
+    min_humidity, the season is listed, and the biotope equals one of its habitats or is compatible
+    with one of them according to HABITAT_COMPAT.
+    param champignons: SpeciesCatalog, or list of mushroom dicts with keys 'min_temp', 'max_temp', 'min_humidity', 'season', 'habitat'
     param temperature: Current temperature
     param humidity: Current humidity
-    param season: Current season (e.g., 'spring', 'summer', 'autumn
+    param season: Current season (e.g., 'spring', 'summer', 'autumn', 'winter')
     param biotope: Current biotope (e.g., 'forêt de feuillus')
     """
-    filtered = []
-    for champ in champignons:
-        temp_ok = champ["min_temp"] <= temperature <= champ["max_temp"]
-        humidity_ok = champ["min_humidity"] <= humidity
-        season_ok = season in champ["season"]
-        habitat_ok = any(
-            biotope == h or biotope in HABITAT_COMPAT.get(h, [])
-            for h in champ["habitat"]
-        )
+    if isinstance(champignons, SpeciesCatalog):
+        engine = champignons.filter_engine
+    else:
+        engine = ColumnarFilter(champignons, HABITAT_COMPAT)
+    return engine.filter(temperature, humidity, season, biotope)
 
-        if temp_ok and humidity_ok and season_ok and habitat_ok:
-            filtered.append(champ)
-    return filtered
+
+def filter_aquatics(catalog, temperature, humidity, season):
+    """
+    Filters the aquatic species of the catalog, for points located in water.
+    The habitat is not checked: being in water is the habitat.
+    param catalog: SpeciesCatalog
+    param temperature: Current temperature
+    param humidity: Current humidity
+    param season: Current season
+    """
+    return [
+        champ for champ in catalog.aquatics
+        if champ["min_temp"] <= temperature <= champ["max_temp"]
+        and champ["min_humidity"] <= humidity
+        and season in champ["season"]
+    ]
+
+
+def filter_mushrooms_batch(champignons, temperatures, humidities, seasons, biotopes):
+    """
+    Filters the mushrooms for many environmental conditions in one vectorized pass.
+    Condition i is (temperatures[i], humidities[i], seasons[i], biotopes[i]) and is evaluated
+    exactly like filter_mushrooms. Returns one list of matching mushrooms per condition.
+    param champignons: SpeciesCatalog, or list of mushroom dicts
+    param temperatures: Sequence of temperatures
+    param humidities: Sequence of humidities
+    param seasons: Sequence of seasons
+    param biotopes: Sequence of biotopes
+    """
+    if isinstance(champignons, SpeciesCatalog):
+        engine = champignons.filter_engine
+    else:
+        engine = ColumnarFilter(champignons, HABITAT_COMPAT)
+    return [
+        [engine.species[i] for i in indices]
+        for indices in engine.indices_batch(temperatures, humidities, seasons, biotopes)
+    ]
 
 
 # -----------------------------
 # 6. Retrieval of mushroom images from iNaturalist
 # -----------------------------
 
-def get_mushroom_image(species_name="Amanita muscaria"):
+# Cache persistant des URLs d'images, partagé entre workers
+IMAGE_CACHE_TTL = float(os.getenv("IMAGE_CACHE_TTL", str(7 * 24 * 3600)))
+IMAGE_CACHE_NEGATIVE_TTL = float(os.getenv("IMAGE_CACHE_NEGATIVE_TTL", str(24 * 3600)))
+image_cache = PersistentCache("image_urls", ttl=IMAGE_CACHE_TTL, negative_ttl=IMAGE_CACHE_NEGATIVE_TTL)
+
+
+async def fetch_mushroom_image(species_name):
     """
-    Returns a URL of an image for the given mushroom species from iNaturalist.
-    If no image is found, returns None.
+    Queries iNaturalist for an image of the given species, bypassing the cache.
+    Returns the image URL, or None if iNaturalist has no photo. Network errors are raised.
     param species_name: Scientific name of the mushroom species
     """
     url = "https://api.inaturalist.org/v1/observations"
@@ -277,21 +578,42 @@ def get_mushroom_image(species_name="Amanita muscaria"):
         "quality_grade": "research"
     }
 
-    try:
-        res = requests.get(url, params=params, timeout=10)
-        res.raise_for_status()
-        data = res.json()
+    res = await upstream.get("inaturalist", url, params=params)
+    res.raise_for_status()
+    data = res.json()
 
-        results = data.get("results", [])
-        if not results:
-            return None
+    results = data.get("results", [])
+    if not results:
+        return None
 
-        photos = results[0].get("photos", [])
-        if not photos:
-            return None
+    photos = results[0].get("photos", [])
+    if not photos:
+        return None
+
+    return photos[0]["url"].replace("square", "large")
+
+
+async def get_mushroom_image(species_name="Amanita muscaria"):
+    """
+    Returns a URL of an image for the given mushroom species from iNaturalist.
+    If no image is found, returns None.
+    Results are cached by scientific name for IMAGE_CACHE_TTL seconds, and "no photo" answers
+    for IMAGE_CACHE_NEGATIVE_TTL seconds. Failed lookups are not cached. Concurrent misses on the
+    same species share one iNaturalist call.
+    param species_name: Scientific name of the mushroom species
+    """
+    key = species_name.lower()
+    hit, image_url = image_cache.get(key)
+    if hit:
+        return image_url
 
-        return photos[0]["url"].replace("square", "large")
+    async def load():
+        image_url = await fetch_mushroom_image(species_name)
+        await image_cache.aset(key, image_url)
+        return image_url
 
+    try:
+        return await flights.do(("image", key), load)
     except Exception as e:
         print(f"Erreur image iNaturalist pour '{species_name}': {e}")
         return None
@@ -300,84 +622,271 @@ def get_mushroom_image(species_name="Amanita muscaria"):
 # 7. Preparation of JSON for API (filtered JSON)
 # -----------------------------
 
-def get_mushrooms(lat, lon, file="mushrooms_cleaned.json"):
+# Nombre maximal d'appels d'enrichissement (image, recette) simultanés par requête
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "8"))
+# Délai maximal accordé à chaque appel d'enrichissement, en secondes
+ENRICH_TIMEOUT = float(os.getenv("ENRICH_TIMEOUT", "8"))
+
+
+async def _bounded(semaphore, coro_fn, timeout):
     """
-    Returns a list of mushrooms filtered by environmental conditions at the given latitude and longitude.
+    Runs coro_fn() while holding a slot of the semaphore, within the given timeout.
+    Returns None on timeout or error so a single slow upstream never fails the whole response.
+    """
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(coro_fn(), timeout)
+        except Exception as e:
+            print(f"Enrichissement abandonné: {e!r}")
+            return None
+
+
+# Enrichissements optionnels (paramètre `include`) et champ de la réponse que chacun remplit
+ENRICHMENTS = {"image": "image_url", "recipe": "recipe"}
+
+
+def resolve_include(include=None, fields=None):
+    """
+    Returns the enrichments to fetch: those of `include` (all of ENRICHMENTS if None) whose
+    field is part of the requested `fields` (all fields if None).
+    """
+    include = ENRICHMENTS if include is None else include
+    return tuple(name for name in include if fields is None or ENRICHMENTS[name] in fields)
+
+
+def project(record, fields=None):
+    """
+    Returns the record restricted to the given fields, in the record's order (the record itself if fields is None).
+    """
+    if fields is None:
+        return record
+    return {key: value for key, value in record.items() if key in fields}
+
+
+async def fetch_enrichment(champ, semaphore, timeout=None, include=None):
     """
+    Returns the (image_url, recipe) pair for a mushroom, fetched concurrently.
+    The recipe is only requested for edible mushrooms. Enrichments missing from `include` are not fetched (None).
+    param champ: Mushroom dict
+    param semaphore: asyncio.Semaphore bounding the number of concurrent upstream calls
+    param timeout: Per-call timeout in seconds (defaults to ENRICH_TIMEOUT)
+    param include: Enrichments to fetch among ENRICHMENTS (all if None)
+    """
+    timeout = ENRICH_TIMEOUT if timeout is None else timeout
+    include = ENRICHMENTS if include is None else include
+
+    async def nothing():
+        return None
 
-    # 1. Vérifier si les coordonnées sont dans l'eau
-    if is_water(lat, lon):
-        with open(file, "r", encoding="utf-8") as f:
-            champignons = json.load(f)
+    return await asyncio.gather(
+        _bounded(semaphore, lambda: get_mushroom_image(champ["scientific_name"]), timeout)
+        if "image" in include else nothing(),
+        _bounded(semaphore, get_mushroom_recipe, timeout)
+        if "recipe" in include and champ["edibility"] == "edible" else nothing(),
+    )
 
-        aquatics = [
-            champ for champ in champignons
-            if champ["scientific_name"].lower() == "psathyrella aquatica"
-        ]
 
-        temperature, humidity = get_weather(lat, lon)
-        season = get_season()
+async def enrich_mushrooms(filtered, concurrency=None, timeout=None, include=None, fields=None):
+    """
+    Builds the API records for the given mushrooms, fetching images and recipes as a parallel
+    fan-out bounded by `concurrency`. The output keeps the order of `filtered`.
+    Only the enrichments in `include` that are part of `fields` are fetched; without any, no upstream call is made.
+    param filtered: List of mushroom dicts
+    param concurrency: Maximum number of concurrent upstream calls (defaults to ENRICH_CONCURRENCY)
+    param timeout: Per-call timeout in seconds (defaults to ENRICH_TIMEOUT)
+    param include: Enrichments among ENRICHMENTS (all if None)
+    param fields: Fields of each record to return (all if None)
+    """
+    include = resolve_include(include, fields)
+    if include:
+        semaphore = asyncio.Semaphore(concurrency or ENRICH_CONCURRENCY)
+        enrichments = await asyncio.gather(*(
+            fetch_enrichment(champ, semaphore, timeout, include) for champ in filtered
+        ))
+    else:
+        enrichments = [(None, None)] * len(filtered)
 
-        filtered = [
-            champ for champ in aquatics
-            if champ["min_temp"] <= temperature <= champ["max_temp"]
-            and champ["min_humidity"] <= humidity
-            and season in champ["season"]
-        ]
+    return [
+        build_record(champ, image_url, recipe, include, fields)
+        for champ, (image_url, recipe) in zip(filtered, enrichments)
+    ]
 
-        api_data = []
-        for champ in filtered:
-            image_url = get_mushroom_image(champ["scientific_name"])
-            recipe = get_mushroom_recipe() if champ["edibility"] == "edible" else None
 
-            api_data.append({
-                "scientific_name": champ["scientific_name"],
-                "common_name": champ["common_name"],
-                "edibility": champ["edibility"],
-                "toxicity": champ["toxicity"],
-                "psychoactive": champ["psychoactive"],
-                "image_url": image_url,
-                "recipe": recipe
-            })
+def build_record(champ, image_url, recipe, include, fields=None):
+    """
+    Returns the API record of a mushroom, with the enrichments of `include`, restricted to `fields`.
+    """
+    record = {
+        "scientific_name": champ["scientific_name"],
+        "common_name": champ["common_name"],
+        "edibility": champ["edibility"],
+        "toxicity": champ["toxicity"],
+        "psychoactive": champ["psychoactive"],
+    }
+    if "image" in include:
+        record["image_url"] = image_url
+    if "recipe" in include:
+        record["recipe"] = recipe
+    return project(record, fields)
 
-        return api_data
 
+async def find_mushrooms(lat, lon, file="mushrooms_cleaned.json"):
+    """
+    Returns the catalog entries matching the environmental conditions at the given latitude and longitude.
+    The OSM land cover (water check and biotope) and the weather are independent upstream calls and
+    are fetched concurrently, so the latency is the one of the slowest call rather than their sum.
+    """
+    catalog = get_catalog(file)
 
-    # 2. Récupérer météo + saison
-    temperature, humidity = get_weather(lat, lon)
+    # 1. Occupation du sol OSM (eau + biotope, une seule requête) et météo en parallèle
+    landcover, (temperature, humidity) = await asyncio.gather(
+        get_landcover(lat, lon),
+        get_weather(lat, lon),
+    )
     season = get_season()
 
-    # 3. Déterminer biotope via OSM
-    biotope = refine_biotope_osm(lat, lon)
+    # 2. Coordonnées dans l'eau : seules les espèces aquatiques sont possibles
+    if landcover["water"]:
+        return filter_aquatics(catalog, temperature, humidity, season)
 
-    # 4. Fallback si OSM ne renvoie rien
+    # 3. Biotope OSM, fallback si OSM ne renvoie rien
+    biotope = pick_biotope(landcover["biotopes"])
     if biotope is None:
         biotope = determine_biotope(temperature, humidity, season)
 
-    # 5. Charger les champignons
-    with open(file, "r", encoding="utf-8") as f:
-        champignons = json.load(f)
+    # 4. Filtrer le catalogue (chargé une seule fois en mémoire)
+    return filter_mushrooms(catalog, temperature, humidity, season, biotope)
+
+
+async def get_mushrooms(lat, lon, file="mushrooms_cleaned.json", include=None, fields=None):
+    """
+    Returns a list of mushrooms filtered by environmental conditions at the given latitude and longitude.
+    `include` and `fields` select the enrichments and the record fields (see enrich_mushrooms).
+    """
+    filtered = await find_mushrooms(lat, lon, file)
+
+    # 5. Construire la réponse API (images et recettes demandées, en parallèle)
+    return await enrich_mushrooms(filtered, include=include, fields=fields)
+
+
+async def stream_mushrooms(lat, lon, file="mushrooms_cleaned.json", include=None, fields=None, concurrency=None, timeout=None):
+    """
+    Yields the (index, record) pairs of get_mushrooms as soon as each record's enrichment completes,
+    so the first result does not wait for the slowest image or recipe lookup.
+    `index` is the position of the record in the get_mushrooms list.
+    Enrichments still running when the consumer stops (e.g. client disconnect) are cancelled.
+    """
+    filtered = await find_mushrooms(lat, lon, file)
+    include = resolve_include(include, fields)
+    if not include:
+        for index, champ in enumerate(filtered):
+            yield index, build_record(champ, None, None, include, fields)
+        return
+
+    semaphore = asyncio.Semaphore(concurrency or ENRICH_CONCURRENCY)
+
+    async def enrich(index, champ):
+        image_url, recipe = await fetch_enrichment(champ, semaphore, timeout, include)
+        return index, build_record(champ, image_url, recipe, include, fields)
+
+    tasks = [asyncio.ensure_future(enrich(index, champ)) for index, champ in enumerate(filtered)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+# Nombre maximal d'appels météo / Overpass simultanés pendant un lot
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
 
-    # 6. Filtrer
-    filtered = filter_mushrooms(champignons, temperature, humidity, season, biotope)
+async def _gather_bounded(coro_fns, concurrency):
+    """
+    Awaits coro_fn() for each function, at most `concurrency` at a time, and returns the results in order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(coro_fn):
+        async with semaphore:
+            return await coro_fn()
+
+    return await asyncio.gather(*(run(coro_fn) for coro_fn in coro_fns))
 
-    # 7. Construire la réponse API
-    api_data = []
-    for champ in filtered:
-        image_url = get_mushroom_image(champ["scientific_name"])
-        recipe = get_mushroom_recipe() if champ["edibility"] == "edible" else None
 
-        api_data.append({
-            "scientific_name": champ["scientific_name"],
-            "common_name": champ["common_name"],
-            "edibility": champ["edibility"],
-            "toxicity": champ["toxicity"],
-            "psychoactive": champ["psychoactive"],
-            "image_url": image_url,
-            "recipe": recipe
-        })
+async def get_mushrooms_batch(points, file="mushrooms_cleaned.json"):
+    """
+    Returns the mushrooms for many points at once, in the order of `points`.
+    Weather is fetched once per distinct WEATHER_GRID_DEG cell and land cover once per distinct
+    LANDCOVER_TILE_DEG tile. The catalog is then filtered once per distinct condition tuple in a
+    single vectorized pass, and each matching species is enriched only once for the whole batch.
+    param points: List of (latitude, longitude) tuples
+    param file: Path to the cleaned mushrooms JSON file
+    """
+    catalog = get_catalog(file)
+    season = get_season()
 
-    return api_data
+    # 1. Une requête météo par case, une requête OSM par tuile
+    weather_cells = {}
+    landcover_tiles = {}
+    for lat, lon in points:
+        weather_cells.setdefault(grid_cell(lat, lon, WEATHER_GRID_DEG), (lat, lon))
+        landcover_tiles.setdefault(landcover_tile(lat, lon)[1], (lat, lon))
+
+    weathers, landcovers = await asyncio.gather(
+        _gather_bounded([lambda p=p: get_weather(*p) for p in weather_cells.values()], BATCH_CONCURRENCY),
+        _gather_bounded([lambda p=p: get_landcover(*p) for p in landcover_tiles.values()], BATCH_CONCURRENCY),
+    )
+    weather_by_cell = dict(zip(weather_cells, weathers))
+    landcover_by_tile = dict(zip(landcover_tiles, landcovers))
+
+    # 2. Conditions de chaque point ; un biotope tiré par tuile
+    biotope_by_tile = {
+        key: pick_biotope(landcover["biotopes"])
+        for key, landcover in landcover_by_tile.items()
+    }
+    conditions = []
+    for lat, lon in points:
+        temperature, humidity = weather_by_cell[grid_cell(lat, lon, WEATHER_GRID_DEG)]
+        key = landcover_tile(lat, lon)[1]
+        if landcover_by_tile[key]["water"]:
+            conditions.append((True, temperature, humidity, season, None))
+        else:
+            biotope = biotope_by_tile[key]
+            if biotope is None:
+                biotope = determine_biotope(temperature, humidity, season)
+            conditions.append((False, temperature, humidity, season, biotope))
+
+    # 3. Un seul filtrage par condition distincte
+    distinct = list(dict.fromkeys(conditions))
+    land = [c for c in distinct if not c[0]]
+    filtered_by_condition = {
+        c: filter_aquatics(catalog, c[1], c[2], c[3]) for c in distinct if c[0]
+    }
+    if land:
+        _, temperatures, humidities, seasons, biotopes = zip(*land)
+        batch = filter_mushrooms_batch(catalog, temperatures, humidities, seasons, biotopes)
+        filtered_by_condition.update(zip(land, batch))
+
+    # 4. Un seul enrichissement par espèce pour tout le lot
+    species = list({
+        champ["scientific_name"]: champ
+        for filtered in filtered_by_condition.values() for champ in filtered
+    }.values())
+    enriched = dict(zip(
+        (champ["scientific_name"] for champ in species),
+        await enrich_mushrooms(species)
+    ))
+
+    return [
+        {
+            "latitude": lat,
+            "longitude": lon,
+            "mushrooms": [enriched[champ["scientific_name"]] for champ in filtered_by_condition[condition]]
+        }
+        for (lat, lon), condition in zip(points, conditions)
+    ]
 
 
 # ----------------------------------------
@@ -389,79 +898,78 @@ def get_all_mushrooms(json_path="app/mushrooms_cleaned.json"):
     Returns the full list of mushrooms from the cleaned JSON file.
     param json_path: Path to the cleaned mushrooms JSON file
     """
-    with open(json_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_catalog(json_path).species
 
 # ----------------------------------------
 # 9. Retrieval of mushroom details by mushroom name
 # ----------------------------------------
 
-def get_mushroom_details_by_name(scientific_name, json_path="app/mushrooms_cleaned.json"):
+async def get_mushroom_details_by_name(name, json_path="app/mushrooms_cleaned.json", include=None, fields=None):
     """
-    Returns the details of a mushroom given its scientific name.
-    Adds an image URL and a recipe if the mushroom is edible.
+    Returns the details of a mushroom given its scientific or common name (case and accents are ignored).
+    Adds an image URL and a recipe if the mushroom is edible, unless left out of `include` or `fields`.
     """
-    with open(json_path, "r", encoding="utf-8") as f:
-        champignons = json.load(f)
-    
-    for champ in champignons:
-        if champ["scientific_name"].lower() == scientific_name.lower():
-            
-            image_url = get_mushroom_image(champ["scientific_name"])
+    found = get_catalog(json_path).get_by_name(name)
+    if found is None:
+        return None
+
+    include = resolve_include(include, fields)
+    # Copie pour ne pas modifier l'entrée partagée du catalogue
+    champ = dict(found)
+    if include:
+        image_url, recipe = await fetch_enrichment(champ, asyncio.Semaphore(ENRICH_CONCURRENCY), include=include)
+        if "image" in include:
             champ["image_url"] = image_url
+        if "recipe" in include:
+            champ["recipe"] = recipe
 
-            if champ["edibility"] == "edible":
-                champ["recipe"] = get_mushroom_recipe()
-            else:
-                champ["recipe"] = None
+    return project(champ, fields)
 
-            return champ
-    
-    return None
+
+def search_mushroom_names(prefix, json_path="app/mushrooms_cleaned.json", limit=10):
+    """
+    Returns the autocomplete matches of a name prefix (see NameIndex.prefix).
+    param prefix: Beginning of a scientific or common name
+    param json_path: Path to the cleaned mushrooms JSON file
+    param limit: Maximum number of matches
+    """
+    return get_catalog(json_path).search_names(prefix, limit)
+
+
+def search_mushrooms_text(query, json_path="app/mushrooms_cleaned.json", limit=20):
+    """
+    Returns the mushrooms best matching a free-text French query (e.g. "bois mort comestible"),
+    best first, each with its relevance score.
+    param query: Words to look for in the notes, names and habitats
+    param json_path: Path to the cleaned mushrooms JSON file
+    param limit: Maximum number of results
+    """
+    return [
+        {**champ, "score": round(score, 4)}
+        for score, champ in get_catalog(json_path).search_text(query, limit)
+    ]
 
 
 # ----------------------------------------
 # 10. Get meals for a given mushroom 
 # ----------------------------------------
 
-def get_mushroom_recipe():
+async def get_mushroom_recipe():
     """
     Returns a random mushroom-based recipe from TheMealDB.
+    Recipes come from the local pool refreshed in the background; TheMealDB is only queried
+    directly while the pool has not been filled yet, with concurrent identical calls coalesced.
     """
-    try:
-        search_url = "https://www.themealdb.com/api/json/v1/1/filter.php"
-        res = requests.get(search_url, params={"i": "mushrooms"}, timeout=10)
-        data = res.json()
+    recipe = recipe_pool.pick()
+    if recipe is not None:
+        return recipe
 
-        meals = data.get("meals")
-        if not meals:
+    try:
+        meal_ids = await flights.do(("mealdb", "ids"), fetch_mushroom_meal_ids)
+        if not meal_ids:
             return None
-
-        meal = random.choice(meals)
-        meal_id = meal["idMeal"]
-
-        detail_url = "https://www.themealdb.com/api/json/v1/1/lookup.php"
-        detail_res = requests.get(detail_url, params={"i": meal_id}, timeout=10)
-        detail_data = detail_res.json()
-
-        meal_detail = detail_data["meals"][0]
-
-        ingredients = []
-        for i in range(1, 21):
-            ing = meal_detail.get(f"strIngredient{i}")
-            qty = meal_detail.get(f"strMeasure{i}")
-            if ing and ing.strip():
-                ingredients.append(f"{qty.strip()} {ing.strip()}")
-
-        return {
-            "name": meal_detail["strMeal"],
-            "category": meal_detail["strCategory"],
-            "area": meal_detail["strArea"],
-            "instructions": meal_detail["strInstructions"],
-            "ingredients": ingredients,
-            "image": meal_detail["strMealThumb"],
-            "source": meal_detail.get("strSource") or "https://www.themealdb.com"
-        }
+        meal_id = random.choice(meal_ids)
+        return await flights.do(("mealdb", meal_id), lambda: fetch_meal(meal_id))
 
     except Exception as e:
         print(f"Erreur recette TheMealDB: {e}")
@@ -0,0 +1,55 @@
+import asyncio
+
+# -----------------------------
+# Request coalescing (single-flight)
+# -----------------------------
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls sharing the same key into a single in-flight computation.
+    The first caller starts the computation; the others await it and get the same result (or exception).
+    The key is forgotten as soon as the computation ends, so later calls start a new one.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, coro_fn):
+        """
+        Returns the result of coro_fn(), shared with every concurrent call using the same key.
+        A cancelled caller does not cancel the computation awaited by the others.
+        param key: Hashable key identifying the computation
+        param coro_fn: Coroutine function without arguments
+        """
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(coro_fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Marque l'exception comme lue même si tous les appelants ont été annulés
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+flights = SingleFlight()
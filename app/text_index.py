@@ -0,0 +1,115 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+from app.name_index import normalize
+
+# -----------------------------
+# Full-text index (French) over the species catalog
+# -----------------------------
+
+# Mots vides français (déjà sans accents, comme les jetons)
+STOPWORDS = {
+    "a", "au", "aux", "avec", "ce", "ces", "cet", "cette", "dans", "de", "des", "du", "en", "et",
+    "est", "il", "ils", "elle", "elles", "la", "le", "les", "leur", "leurs", "mais", "ne", "ni",
+    "on", "ou", "par", "pas", "peu", "plus", "pour", "qu", "que", "qui", "sa", "se", "ses", "son",
+    "sont", "sous", "sur", "tres", "un", "une", "y",
+}
+
+# Champs indexés et leur poids dans le score
+FIELD_WEIGHTS = {
+    "scientific_name": 3.0,
+    "common_name": 3.0,
+    "habitat": 2.0,
+    "notes": 1.0,
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def stem(token):
+    """
+    Light French plural stemming: "chapeaux" -> "chapeau", "vegetaux" -> "vegetal", "forets" -> "foret".
+    """
+    if len(token) <= 3:
+        return token
+    if token.endswith("eaux"):
+        return token[:-1]
+    if token.endswith("aux") and len(token) > 4:
+        return token[:-3] + "al"
+    if token[-1] in "sx":
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """
+    Splits French text into index terms: casefolded, accents stripped, elisions (l', d') and stopwords
+    dropped, plurals stemmed.
+    """
+    return [
+        stem(token)
+        for token in TOKEN_RE.findall(normalize(text))
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+class TextIndex:
+    """
+    Inverted index over the notes, names and habitats of the catalog, ranked with BM25.
+    Term frequencies are weighted per field (FIELD_WEIGHTS). A query only walks the postings of
+    its own terms, so its cost depends on how many species match, not on the catalog size.
+    """
+
+    def __init__(self, species, k1=1.2, b=0.75):
+        """
+        param species: List of mushroom dicts
+        param k1: BM25 term frequency saturation
+        param b: BM25 document length normalization
+        """
+        self.species = list(species)
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.lengths = []
+
+        for doc_id, champ in enumerate(self.species):
+            frequencies = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                value = champ.get(field) or ""
+                text = " ".join(value) if isinstance(value, list) else value
+                for term in tokenize(text):
+                    frequencies[term] += weight
+            for term, frequency in frequencies.items():
+                self.postings[term].append((doc_id, frequency))
+            self.lengths.append(sum(frequencies.values()))
+
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        n = len(self.species)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.postings)
+
+    def search(self, query, limit=20):
+        """
+        Returns up to `limit` (score, species) pairs, best first, for the species matching any query term.
+        Species matching more (and rarer) terms rank higher.
+        param query: Free text, e.g. "bois mort comestible"
+        param limit: Maximum number of results
+        """
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, frequency in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.average_length)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(score, self.species[doc_id]) for doc_id, score in best]
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import time
+
+import httpx
+
+# -----------------------------
+# Shared HTTP client for every upstream API
+# -----------------------------
+# Un pool de connexions keep-alive par upstream (un hôte chacun), avec timeout, nombre de
+# tentatives et backoff propres à chaque upstream, et des compteurs exposés dans /metrics.
+
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "20"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "10"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+UPSTREAM_BACKOFF = float(os.getenv("UPSTREAM_BACKOFF", "0.2"))
+
+# Codes HTTP pour lesquels une nouvelle tentative a du sens
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+def _upstream(name, timeout, retries):
+    """
+    Returns the configuration of an upstream; UPSTREAM_<NAME>_TIMEOUT and UPSTREAM_<NAME>_RETRIES override the defaults.
+    """
+    prefix = f"UPSTREAM_{name.upper()}"
+    return {
+        "timeout": float(os.getenv(f"{prefix}_TIMEOUT", str(timeout))),
+        "retries": int(os.getenv(f"{prefix}_RETRIES", str(retries))),
+    }
+
+
+UPSTREAMS = {
+    "ipinfo": _upstream("ipinfo", timeout=5, retries=0),
+    "wttr": _upstream("wttr", timeout=5, retries=0),
+    "open_meteo": _upstream("open_meteo", timeout=5, retries=0),
+    "overpass": _upstream("overpass", timeout=15, retries=1),
+    "inaturalist": _upstream("inaturalist", timeout=10, retries=2),
+    "mealdb": _upstream("mealdb", timeout=10, retries=2),
+}
+
+
+class UpstreamClient:
+    """
+    Keeps one pooled httpx.AsyncClient per upstream and sends requests through it.
+    Clients are created lazily on the running event loop, and recreated if the loop changes.
+    """
+
+    def __init__(self, upstreams=None, max_connections=None, max_keepalive=None, transport=None):
+        """
+        param upstreams: {name: {"timeout": seconds, "retries": count}} (defaults to UPSTREAMS)
+        param max_connections: Connection pool size of each upstream (defaults to UPSTREAM_MAX_CONNECTIONS)
+        param max_keepalive: Idle keep-alive connections kept per upstream (defaults to UPSTREAM_MAX_KEEPALIVE)
+        param transport: Optional httpx transport (e.g. httpx.MockTransport in tests)
+        """
+        self.upstreams = upstreams or UPSTREAMS
+        self.transport = transport
+        self.limits = httpx.Limits(
+            max_connections=max_connections or UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive or UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+        )
+        self._clients = {}
+        self._loop = None
+        self.counters = {
+            name: {"requests": 0, "errors": 0, "retries": 0, "in_flight": 0, "peak_in_flight": 0, "total_time": 0.0}
+            for name in self.upstreams
+        }
+
+    def _client(self, upstream):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Les connexions d'un pool sont liées à la boucle qui les a créées
+            self._clients = {}
+            self._loop = loop
+        client = self._clients.get(upstream)
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.upstreams[upstream]["timeout"],
+                headers={"User-Agent": "ShroomLoc"},
+                transport=self.transport,
+            )
+            self._clients[upstream] = client
+        return client
+
+    async def get(self, upstream, url, **kwargs):
+        """
+        Sends a GET request to the given upstream, retrying transport errors and RETRY_STATUSES
+        with exponential backoff. Returns the httpx.Response; raises the last error once retries are exhausted.
+        param upstream: Name of the upstream in UPSTREAMS
+        param url: Request URL
+        """
+        client = self._client(upstream)
+        retries = self.upstreams[upstream]["retries"]
+        counters = self.counters[upstream]
+
+        attempt = 0
+        while True:
+            counters["requests"] += 1
+            counters["in_flight"] += 1
+            counters["peak_in_flight"] = max(counters["peak_in_flight"], counters["in_flight"])
+            start = time.perf_counter()
+            try:
+                res = await client.get(url, **kwargs)
+            except httpx.TransportError:
+                counters["errors"] += 1
+                if attempt >= retries:
+                    raise
+            else:
+                if res.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return res
+                counters["errors"] += 1
+            finally:
+                counters["in_flight"] -= 1
+                counters["total_time"] += time.perf_counter() - start
+
+            counters["retries"] += 1
+            await asyncio.sleep(UPSTREAM_BACKOFF * 2 ** attempt)
+            attempt += 1
+
+    def stats(self):
+        """
+        Returns the pool configuration and per-upstream request counters.
+        """
+        return {
+            "max_connections_per_upstream": self.limits.max_connections,
+            "max_keepalive_per_upstream": self.limits.max_keepalive_connections,
+            "open_clients": len(self._clients),
+            "upstreams": {
+                name: {
+                    **{k: v for k, v in counters.items() if k != "total_time"},
+                    "avg_time": round(counters["total_time"] / counters["requests"], 4) if counters["requests"] else None,
+                    "timeout": self.upstreams[name]["timeout"],
+                }
+                for name, counters in self.counters.items()
+            },
+        }
+
+    async def aclose(self):
+        """
+        Closes every pooled client.
+        """
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+upstream = UpstreamClient()
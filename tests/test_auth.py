@@ -0,0 +1,83 @@
+import unittest
+import hashlib
+import sys
+import os
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.auth import create_access_token, create_user, get_current_user, get_user, token_cache, user_cache
+from app.db import Base, get_db
+
+
+class TestAuthCaches(unittest.TestCase):
+    """Unit tests for the verified-token and user caches of get_current_user."""
+
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.sessions = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+        self.patcher = patch('app.db.SessionLocal', self.sessions)
+        self.patcher.start()
+        token_cache.clear()
+        user_cache.clear()
+
+    def tearDown(self):
+        self.patcher.stop()
+        token_cache.clear()
+        user_cache.clear()
+
+    def test_repeat_requests_skip_decode_and_db(self):
+        """Test that a second request with the same token neither decodes it nor queries the database."""
+        create_user("alice", "secret")
+        token = create_access_token({"sub": "alice"})
+        self.assertEqual(get_current_user(token).username, "alice")
+
+        with patch('app.auth.jwt.decode') as mock_decode, patch('app.auth.session_scope') as mock_session:
+            self.assertEqual(get_current_user(token).username, "alice")
+            mock_decode.assert_not_called()
+            mock_session.assert_not_called()
+
+    def test_token_cached_until_expiry(self):
+        """Test that a token is cached no longer than its exp, and expired tokens are rejected."""
+        create_user("alice", "secret")
+        token = create_access_token({"sub": "alice"}, expires_delta=1)
+        get_current_user(token)
+        self.assertLessEqual(token_cache.expires_in(hashlib.sha256(token.encode()).hexdigest()), 60)
+
+        expired = create_access_token({"sub": "alice"}, expires_delta=-1)
+        with self.assertRaises(HTTPException):
+            get_current_user(expired)
+
+    def test_create_user_invalidates_cache(self):
+        """Test that unknown users are not cached and create_user drops any cached record."""
+        token = create_access_token({"sub": "bob"})
+        with self.assertRaises(HTTPException):
+            get_current_user(token)
+        self.assertNotIn("bob", user_cache)
+
+        user_cache.set("bob", "outdated record")
+        create_user("bob", "secret")
+        self.assertNotIn("bob", user_cache)
+        self.assertEqual(get_current_user(token).username, "bob")
+
+    def test_get_user_with_request_session(self):
+        """Test that a cache miss uses the session of the get_db dependency when one is given."""
+        create_user("alice", "secret")
+        dependency = get_db()
+        db = next(dependency)
+        with patch('app.auth.session_scope') as mock_session:
+            self.assertEqual(get_user("alice", db).username, "alice")
+            mock_session.assert_not_called()
+        dependency.close()
+        self.assertIn("alice", user_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+import unittest
+import asyncio
+import tempfile
+import threading
+import sys
+import os
+from unittest.mock import patch
+
+import httpx
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.cache import PersistentCache, TTLCache, grid_cell
+from app.shroomloc import get_mushroom_image, get_weather, get_landcover, WEATHER_GRID_DEG
+
+
+class TestTTLCache(unittest.TestCase):
+    """Unit tests for the in-memory LRU cache."""
+
+    def test_lru_eviction_and_stats(self):
+        """Test that the least recently used entry is evicted and lookups are counted."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 1, 1))
+
+    def test_expiry(self):
+        """Test that expired entries are misses."""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1, ttl=-1)
+        self.assertIsNone(cache.get("a"))
+        self.assertNotIn("a", cache)
+
+    def test_stale_lookup(self):
+        """Test that expired entries are served as stale within stale_ttl only."""
+        cache = TTLCache(maxsize=10, ttl=60, stale_ttl=30)
+        cache.set("fresh", 1)
+        cache.set("stale", 2, ttl=-10)
+        cache.set("old", 3, ttl=-40)
+        self.assertEqual(cache.lookup("fresh"), (1, False))
+        self.assertEqual(cache.lookup("stale"), (2, True))
+        self.assertIsNone(cache.get("stale"))
+        self.assertEqual(cache.lookup("old"), (None, False))
+        self.assertIsNone(cache.expires_in("old"))
+        self.assertLess(cache.expires_in("stale"), 0)
+
+    def test_grid_cell(self):
+        """Test that nearby points share a cell and distant ones do not."""
+        self.assertEqual(grid_cell(47.9899, 0.2906, 0.05), grid_cell(47.9801, 0.2601, 0.05))
+        self.assertNotEqual(grid_cell(47.9899, 0.2906, 0.05), grid_cell(48.0101, 0.2906, 0.05))
+        self.assertEqual(grid_cell(-0.01, -0.01, 0.05), (-0.025, -0.025))
+
+
+class TestWeatherCache(unittest.TestCase):
+    """Unit tests for the grid-cell weather cache."""
+
+    @patch('app.shroomloc.fetch_weather')
+    def test_nearby_points_share_weather(self, mock_fetch):
+        """Test that one upstream call serves every point of a cell, and failures are not cached."""
+        mock_fetch.return_value = (12.0, 85.0)
+        with patch('app.shroomloc.weather_cache', TTLCache(maxsize=100, ttl=60)):
+            self.assertEqual(asyncio.run(get_weather(47.9899, 0.2906)), (12.0, 85.0))
+            self.assertEqual(asyncio.run(get_weather(47.9801, 0.2601)), (12.0, 85.0))
+            self.assertEqual(mock_fetch.call_count, 1)
+
+            mock_fetch.return_value = None
+            self.assertEqual(asyncio.run(get_weather(10.0, 10.0)), (10.0, 80.0))
+            self.assertEqual(asyncio.run(get_weather(10.0, 10.0)), (10.0, 80.0))
+            self.assertEqual(mock_fetch.call_count, 3)
+
+    @patch('app.shroomloc.fetch_weather')
+    def test_stale_weather_is_revalidated(self, mock_fetch):
+        """Test that a stale reading is returned at once and refreshed in the background."""
+        mock_fetch.return_value = (20.0, 60.0)
+        cache = TTLCache(maxsize=100, ttl=60, stale_ttl=60)
+        cell = grid_cell(47.9899, 0.2906, WEATHER_GRID_DEG)
+        cache.set(cell, (12.0, 85.0), ttl=-1)
+
+        async def main():
+            stale = await get_weather(47.9899, 0.2906)
+            await asyncio.sleep(0.01)
+            return stale, await get_weather(47.9899, 0.2906)
+
+        with patch('app.shroomloc.weather_cache', cache):
+            self.assertEqual(asyncio.run(main()), ((12.0, 85.0), (20.0, 60.0)))
+        self.assertEqual(mock_fetch.call_count, 1)
+
+
+class TestPersistentCache(unittest.TestCase):
+    """Unit tests for the SQLite-backed cache."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_and_persistence(self):
+        """Test that values survive reopening the file."""
+        cache = PersistentCache("things", ttl=60, path=self.path)
+        self.assertEqual(cache.get("a"), (False, None))
+        cache.set("a", {"url": "http://example.com"})
+        cache.close()
+
+        reopened = PersistentCache("things", ttl=60, path=self.path)
+        self.assertEqual(reopened.get("a"), (True, {"url": "http://example.com"}))
+        self.assertEqual(len(reopened), 1)
+        reopened.close()
+
+    def test_async_set_commits_off_the_loop(self):
+        """Test that aset() stores the value from a worker thread."""
+        cache = PersistentCache("things", ttl=60, path=self.path)
+        threads = []
+        set_in_thread = cache.set
+
+        def record_thread(*args):
+            threads.append(threading.current_thread())
+            return set_in_thread(*args)
+
+        with patch.object(cache, "set", new=record_thread):
+            asyncio.run(cache.aset("a", None, 60))
+        self.assertEqual(cache.get("a"), (True, None))
+        self.assertNotEqual(threads, [threading.main_thread()])
+        cache.close()
+
+    def test_reads_do_not_wait_for_writes(self):
+        """Test that lookups are answered while a write transaction is still open."""
+        cache = PersistentCache("things", ttl=60, path=self.path)
+        cache.set("a", 1)
+        with cache._lock:
+            cache._connection().execute("INSERT INTO things (key, value, expires_at) VALUES ('b', '2', 1e12)")
+            self.assertEqual(cache.get("a"), (True, 1))
+            self.assertEqual(cache.get("b"), (False, None))
+            cache._connection().commit()
+        self.assertEqual(cache.get("b"), (True, 2))
+        cache.close()
+
+    def test_ttl_and_negative_ttl(self):
+        """Test that expired entries are misses and None uses the negative TTL."""
+        cache = PersistentCache("things", ttl=60, negative_ttl=-1, path=self.path)
+        cache.set("missing", None)
+        cache.set("present", "value")
+        cache.set("expired", "value", ttl=-1)
+        self.assertEqual(cache.get("missing"), (False, None))
+        self.assertEqual(cache.get("present"), (True, "value"))
+        self.assertEqual(cache.get("expired"), (False, None))
+        self.assertEqual(cache.purge_expired(), 2)
+        cache.close()
+
+    def test_stale_lookup(self):
+        """Test that expired entries are served as stale within stale_ttl and kept by purge_expired."""
+        cache = PersistentCache("things", ttl=60, path=self.path, stale_ttl=30)
+        cache.set("fresh", "a")
+        cache.set("stale", "b", ttl=-10)
+        cache.set("old", "c", ttl=-40)
+        self.assertEqual(cache.lookup("fresh"), (True, "a", False))
+        self.assertEqual(cache.lookup("stale"), (True, "b", True))
+        self.assertEqual(cache.get("stale"), (False, None))
+        self.assertEqual(cache.lookup("old"), (False, None, False))
+        self.assertEqual(cache.purge_expired(), 1)
+        cache.close()
+
+    def test_size_cap(self):
+        """Test that the entries closest to expiry are evicted past max_entries."""
+        cache = PersistentCache("things", ttl=60, path=self.path, max_entries=3)
+        cache.EVICT_EVERY = 1
+        for i in range(5):
+            cache.set(str(i), i, ttl=60 + i)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.get("0"), (False, None))
+        self.assertEqual(cache.get("4"), (True, 4))
+        cache.close()
+
+    def test_invalid_table_name(self):
+        """Test that table names are validated."""
+        with self.assertRaises(ValueError):
+            PersistentCache("images; DROP TABLE users", ttl=60, path=self.path)
+
+
+class TestImageCache(unittest.TestCase):
+    """Unit tests for the cached iNaturalist image lookup."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = PersistentCache("image_urls", ttl=60, path=os.path.join(self.tmp.name, "cache.db"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    @patch('app.shroomloc.fetch_mushroom_image')
+    def test_hits_and_negative_caching(self, mock_fetch):
+        """Test that found and "no photo" results are both served from the cache."""
+        mock_fetch.side_effect = lambda name: None if name == "Nophoto" else f"http://example.com/{name}.jpg"
+        with patch('app.shroomloc.image_cache', self.cache):
+            for _ in range(3):
+                self.assertEqual(asyncio.run(get_mushroom_image("Boletus")), "http://example.com/Boletus.jpg")
+                self.assertIsNone(asyncio.run(get_mushroom_image("Nophoto")))
+        self.assertEqual(mock_fetch.call_count, 2)
+
+    @patch('app.shroomloc.fetch_mushroom_image')
+    def test_errors_are_not_cached(self, mock_fetch):
+        """Test that failed lookups are retried on the next call."""
+        mock_fetch.side_effect = RuntimeError("iNaturalist down")
+        with patch('app.shroomloc.image_cache', self.cache):
+            self.assertIsNone(asyncio.run(get_mushroom_image("Boletus")))
+            self.assertIsNone(asyncio.run(get_mushroom_image("Boletus")))
+        self.assertEqual(mock_fetch.call_count, 2)
+
+
+class TestLandcoverCache(unittest.TestCase):
+    """Unit tests for the tile-keyed land cover caches."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "cache.db")
+        self.biotopes = PersistentCache("biotopes", ttl=60, path=path)
+        self.water = PersistentCache("water", ttl=60, path=path)
+
+    def tearDown(self):
+        self.biotopes.close()
+        self.water.close()
+        self.tmp.cleanup()
+
+    @patch('app.shroomloc.fetch_biotopes')
+    @patch('app.shroomloc.fetch_water')
+    def test_same_tile_hits_cache(self, mock_water, mock_biotopes):
+        """Test that points of the same tile are answered from the cache, and failures are not cached."""
+        mock_water.return_value = False
+        mock_biotopes.return_value = ["forêt"]
+        with patch('app.shroomloc.biotope_cache', self.biotopes), patch('app.shroomloc.water_cache', self.water):
+            self.assertEqual(asyncio.run(get_landcover(47.98991, 0.29065)), {"water": False, "biotopes": ["forêt"]})
+            self.assertEqual(asyncio.run(get_landcover(47.98995, 0.29061)), {"water": False, "biotopes": ["forêt"]})
+            self.assertEqual(mock_water.call_count, 1)
+            self.assertEqual(mock_biotopes.call_count, 1)
+
+            mock_water.side_effect = httpx.ConnectError("Overpass down")
+            mock_biotopes.side_effect = httpx.ConnectError("Overpass down")
+            self.assertEqual(asyncio.run(get_landcover(45.0, 2.0)), {"water": False, "biotopes": []})
+            self.assertEqual((len(self.water), len(self.biotopes)), (1, 1))
+
+    @patch('app.shroomloc.fetch_biotopes')
+    @patch('app.shroomloc.fetch_water')
+    def test_water_tiles_are_coarser(self, mock_water, mock_biotopes):
+        """Test that the water verdict is shared by biotope tiles a few hundred meters apart."""
+        mock_water.return_value = False
+        mock_biotopes.return_value = []
+        with patch('app.shroomloc.biotope_cache', self.biotopes), patch('app.shroomloc.water_cache', self.water):
+            asyncio.run(get_landcover(47.9810, 0.2810))
+            asyncio.run(get_landcover(47.9850, 0.2850))
+        self.assertEqual(mock_water.call_count, 1)
+        self.assertEqual(mock_biotopes.call_count, 2)
+        # La requête de biotope, faite au centre de la tuile, couvre les 50 m autour de chacun de ses points
+        self.assertGreater(mock_biotopes.call_args.kwargs["radius"], 50 + 55)
+
+    def test_slow_overpass_is_bounded(self):
+        """Test that a hanging Overpass gives the default answer within LANDCOVER_TIMEOUT, and the late answer is cached."""
+        async def slow_water(lat, lon):
+            await asyncio.sleep(0.2)
+            return True
+
+        async def biotopes(lat, lon, radius):
+            return ["prairie"]
+
+        async def main():
+            first = await get_landcover(47.98991, 0.29065)
+            await asyncio.sleep(0.3)
+            return first, await get_landcover(47.98991, 0.29065)
+
+        with patch('app.shroomloc.biotope_cache', self.biotopes), patch('app.shroomloc.water_cache', self.water), \
+             patch('app.shroomloc.fetch_water', new=slow_water), patch('app.shroomloc.fetch_biotopes', new=biotopes), \
+             patch('app.shroomloc.LANDCOVER_TIMEOUT', 0.05):
+            self.assertEqual(asyncio.run(main()), (
+                {"water": False, "biotopes": ["prairie"]},
+                {"water": True, "biotopes": ["prairie"]},
+            ))
+
+
+if __name__ == "__main__":
+    unittest.main()
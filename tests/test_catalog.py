@@ -0,0 +1,62 @@
+import unittest
+import json
+import tempfile
+import sys
+import os
+
+from pydantic import ValidationError
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.catalog import SpeciesCatalog, get_catalog
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'app', 'mushrooms_cleaned.json')
+
+
+class TestSpeciesCatalog(unittest.TestCase):
+    """Unit tests for the in-memory species catalog."""
+
+    def test_get_catalog_is_loaded_once(self):
+        """Test that the same file always returns the same catalog instance."""
+        first = get_catalog(DATA_FILE)
+        second = get_catalog(os.path.abspath(DATA_FILE))
+        self.assertIs(first, second)
+        self.assertGreater(len(first), 0)
+
+    def test_indexes(self):
+        """Test the name, season, habitat and aquatic indexes."""
+        catalog = get_catalog(DATA_FILE)
+        champ = catalog.get_by_scientific_name("boletus EDULIS")
+        self.assertEqual(champ["scientific_name"], "Boletus edulis")
+        self.assertIs(catalog.get_by_common_name("cèpe de bordeaux"), champ)
+        self.assertIs(catalog.get_by_name("CEPE DE BORDEAUX"), champ)
+        self.assertIn(champ, catalog.by_season["autumn"])
+        self.assertIn(champ, catalog.by_habitat["forêt mixte"])
+        self.assertEqual(
+            [c["scientific_name"] for c in catalog.aquatics],
+            ["Psathyrella aquatica"]
+        )
+
+    def test_records_validated_at_load(self):
+        """Test that validated records keep the file's content and a bad record fails the load."""
+        with open(DATA_FILE, encoding="utf-8") as f:
+            raw = json.load(f)
+        self.assertEqual(get_catalog(DATA_FILE).species, raw)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bad.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([dict(raw[0], edibility="maybe")], f)
+            with self.assertRaises(ValidationError):
+                SpeciesCatalog.from_file(path)
+
+    def test_unknown_name(self):
+        """Test that unknown names return None."""
+        catalog = SpeciesCatalog([])
+        self.assertIsNone(catalog.get_by_scientific_name("Nope"))
+        self.assertIsNone(catalog.get_by_common_name("Nope"))
+
+
+if __name__ == "__main__":
+    unittest.main()
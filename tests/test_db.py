@@ -0,0 +1,63 @@
+import unittest
+import tempfile
+import sys
+import os
+from unittest.mock import patch
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db import Base, PoolMetrics, User, create_db_engine, session_scope
+
+
+class TestDatabase(unittest.TestCase):
+    """Unit tests for the engine settings and the session scope."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_db_engine(f"sqlite:///{os.path.join(self.tmp.name, 'test.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        sessions = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine)
+        self.metrics = PoolMetrics()
+        self.patchers = [patch('app.db.SessionLocal', sessions), patch('app.db.pool_metrics', self.metrics)]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_sqlite_pragmas(self):
+        """Test that SQLite connections use the WAL journal and NORMAL synchronous mode."""
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+            self.assertEqual(conn.execute(text("PRAGMA synchronous")).scalar(), 1)
+
+    def test_session_scope_commits_and_rolls_back(self):
+        """Test that a session is committed on success and rolled back on error."""
+        with session_scope() as db:
+            db.add(User(username="alice", hashed_password="x"))
+        with self.assertRaises(RuntimeError):
+            with session_scope() as db:
+                db.add(User(username="bob", hashed_password="x"))
+                db.flush()
+                raise RuntimeError("boom")
+
+        with session_scope() as db:
+            self.assertEqual([u.username for u in db.query(User).all()], ["alice"])
+
+    def test_pool_metrics(self):
+        """Test that checkouts are counted and connections are returned to the pool."""
+        with session_scope():
+            self.assertEqual(self.metrics.stats(self.engine.pool)["checkedout"], 1)
+        stats = self.metrics.stats(self.engine.pool)
+        self.assertEqual((stats["checkouts"], stats["checkedout"], stats["timeouts"]), (1, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import random
+import sys
+import os
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.catalog import get_catalog
+from app.shroomloc import HABITAT_COMPAT, filter_mushrooms, filter_mushrooms_batch
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'app', 'mushrooms_cleaned.json')
+
+SEASONS = ["winter", "spring", "summer", "autumn", "all year", "monsoon"]
+BIOTOPES = sorted(set(HABITAT_COMPAT) | {"forêt", "sol", "forest"}) + [None]
+
+
+def reference_filter(champignons, temperature, humidity, season, biotope):
+    """Row-by-row implementation the columnar engine must agree with."""
+    filtered = []
+    for champ in champignons:
+        temp_ok = champ["min_temp"] <= temperature <= champ["max_temp"]
+        humidity_ok = champ["min_humidity"] <= humidity
+        season_ok = season in champ["season"]
+        habitat_ok = any(
+            biotope == h or biotope in HABITAT_COMPAT.get(h, [])
+            for h in champ["habitat"]
+        )
+        if temp_ok and humidity_ok and season_ok and habitat_ok:
+            filtered.append(champ)
+    return filtered
+
+
+class TestColumnarFilter(unittest.TestCase):
+    """Unit tests for the columnar filter engine."""
+
+    def test_matches_reference_on_catalog(self):
+        """Test that the engine returns exactly the reference results, in order."""
+        catalog = get_catalog(DATA_FILE)
+        rng = random.Random(42)
+        for _ in range(500):
+            conditions = (
+                rng.choice([rng.uniform(-5, 35), rng.randint(-5, 35)]),
+                rng.uniform(30, 100),
+                rng.choice(SEASONS),
+                rng.choice(BIOTOPES),
+            )
+            expected = reference_filter(catalog.species, *conditions)
+            self.assertEqual(filter_mushrooms(catalog, *conditions), expected)
+            self.assertEqual(filter_mushrooms(catalog.species, *conditions), expected)
+
+    def test_batch_matches_single_calls(self):
+        """Test that the batch API agrees with filter_mushrooms for every condition."""
+        catalog = get_catalog(DATA_FILE)
+        rng = random.Random(7)
+        conditions = [
+            (rng.uniform(-5, 35), rng.uniform(30, 100), rng.choice(SEASONS), rng.choice(BIOTOPES))
+            for _ in range(300)
+        ]
+        temperatures, humidities, seasons, biotopes = zip(*conditions)
+
+        matrix = catalog.filter_engine.match_batch(temperatures, humidities, seasons, biotopes)
+        self.assertEqual(matrix.shape, (len(catalog), len(conditions)))
+
+        results = filter_mushrooms_batch(catalog, temperatures, humidities, seasons, biotopes)
+        for condition, result in zip(conditions, results):
+            self.assertEqual(result, reference_filter(catalog.species, *condition))
+
+    def test_batch_rejects_mismatched_lengths(self):
+        """Test that condition sequences of different lengths are rejected."""
+        engine = get_catalog(DATA_FILE).filter_engine
+        with self.assertRaises(ValueError):
+            engine.match_batch([10, 12], [80], ["autumn"], ["prairie"])
+
+    def test_many_habitats(self):
+        """Test that habitat vocabularies wider than one 64-bit word are handled."""
+        champignons = [
+            {
+                "min_temp": 0, "max_temp": 30, "min_humidity": 0,
+                "season": ["autumn"], "habitat": [f"habitat {i}"]
+            }
+            for i in range(100)
+        ]
+        result = filter_mushrooms(champignons, 10, 50, "autumn", "habitat 99")
+        self.assertEqual(result, [champignons[99]])
+
+    def test_empty_list(self):
+        """Test that an empty list yields no results."""
+        self.assertEqual(filter_mushrooms([], 10, 50, "autumn", "prairie"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import asyncio
+import sys
+import os
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.hashing import HashingPool, HashingPoolFull, hash_password
+
+
+class TestHashingPool(unittest.TestCase):
+    """Unit tests for the argon2 process pool."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.hashed = hash_password("password123")
+        cls.pool = HashingPool(workers=1, max_pending=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def test_verify_in_worker(self):
+        """Test that passwords are verified in the worker process."""
+        self.assertTrue(asyncio.run(self.pool.verify("password123", self.hashed)))
+        self.assertFalse(asyncio.run(self.pool.verify("wrong", self.hashed)))
+
+    def test_saturated_pool_rejects(self):
+        """Test that calls beyond max_pending are rejected at once instead of queued."""
+        async def main():
+            return await asyncio.gather(
+                self.pool.verify("password123", self.hashed),
+                self.pool.verify("password123", self.hashed),
+                return_exceptions=True,
+            )
+
+        accepted, rejected = asyncio.run(main())
+        self.assertTrue(accepted)
+        self.assertIsInstance(rejected, HashingPoolFull)
+        self.assertGreaterEqual(self.pool.stats()["rejected"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
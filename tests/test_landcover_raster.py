@@ -0,0 +1,100 @@
+import unittest
+import asyncio
+import tempfile
+import sys
+import os
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app et d'utils
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'utils'))
+
+from app.landcover_raster import (
+    LandcoverRaster, CONIFEROUS_FOREST, FOREST, MEADOW, UNKNOWN, WATER, classify_tags
+)
+from app.shroomloc import get_landcover
+from build_landcover_raster import assemble_rings, build_raster, read_extract
+
+# Une forêt de conifères (0..1, 0..1) avec un lac (0.4..0.6) au milieu,
+# et une prairie en multipolygone découpée en deux chemins (0..1, 2..3).
+EXTRACT = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <bounds minlat="0" minlon="0" maxlat="1" maxlon="3"/>
+  <node id="1" lat="0" lon="0"/><node id="2" lat="0" lon="1"/>
+  <node id="3" lat="1" lon="1"/><node id="4" lat="1" lon="0"/>
+  <node id="5" lat="0.4" lon="0.4"/><node id="6" lat="0.4" lon="0.6"/>
+  <node id="7" lat="0.6" lon="0.6"/><node id="8" lat="0.6" lon="0.4"/>
+  <node id="9" lat="0" lon="2"/><node id="10" lat="0" lon="3"/>
+  <node id="11" lat="1" lon="3"/><node id="12" lat="1" lon="2"/>
+  <way id="100">
+    <nd ref="1"/><nd ref="2"/><nd ref="3"/><nd ref="4"/><nd ref="1"/>
+    <tag k="natural" v="wood"/><tag k="leaf_type" v="needleleaved"/>
+  </way>
+  <way id="101">
+    <nd ref="5"/><nd ref="6"/><nd ref="7"/><nd ref="8"/><nd ref="5"/>
+    <tag k="natural" v="water"/>
+  </way>
+  <way id="102"><nd ref="9"/><nd ref="10"/><nd ref="11"/></way>
+  <way id="103"><nd ref="9"/><nd ref="12"/><nd ref="11"/></way>
+  <relation id="200">
+    <member type="way" ref="102" role="outer"/>
+    <member type="way" ref="103" role="outer"/>
+    <tag k="type" v="multipolygon"/><tag k="landuse" v="meadow"/>
+  </relation>
+</osm>
+"""
+
+
+class TestLandcoverRaster(unittest.TestCase):
+    """Unit tests for the offline land cover raster and its builder."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        extract = os.path.join(self.tmp.name, "region.osm")
+        with open(extract, "w", encoding="utf-8") as f:
+            f.write(EXTRACT)
+        self.output = os.path.join(self.tmp.name, "landcover.npy")
+        areas, bounds = read_extract(extract)
+        build_raster(areas, bounds["minlat"], bounds["minlon"], bounds["maxlat"], bounds["maxlon"], 0.05, self.output)
+        self.raster = LandcoverRaster(self.output)
+
+    def tearDown(self):
+        del self.raster
+        self.tmp.cleanup()
+
+    def test_classify_tags(self):
+        """Test the OSM tags to class code mapping."""
+        self.assertEqual(classify_tags({"natural": "wood"}), FOREST)
+        self.assertEqual(classify_tags({"landuse": "forest", "leaf_type": "needleleaved"}), CONIFEROUS_FOREST)
+        self.assertEqual(classify_tags({"landuse": "pasture"}), MEADOW)
+        self.assertEqual(classify_tags({"highway": "path"}), UNKNOWN)
+
+    def test_assemble_rings(self):
+        """Test that split ways are joined into a closed ring."""
+        self.assertEqual(assemble_rings([[1, 2, 3], [1, 4, 3]]), [[1, 4, 3, 2, 1]])
+        self.assertEqual(assemble_rings([[1, 2, 3]]), [])
+
+    def test_lookups(self):
+        """Test that smaller areas are painted on top and multipolygons are filled."""
+        self.assertEqual(self.raster.class_at(0.2, 0.2), CONIFEROUS_FOREST)
+        self.assertEqual(self.raster.class_at(0.5, 0.5), WATER)
+        self.assertEqual(self.raster.class_at(0.5, 2.5), MEADOW)
+        self.assertEqual(self.raster.class_at(0.5, 1.5), UNKNOWN)
+        self.assertIsNone(self.raster.class_at(2.0, 0.5))
+        self.assertEqual(self.raster.landcover(0.2, 0.2), {"water": False, "biotopes": ["forêt de conifères"]})
+        self.assertEqual(self.raster.landcover(0.5, 0.5), {"water": True, "biotopes": []})
+
+    @patch('app.shroomloc.fetch_biotopes')
+    @patch('app.shroomloc.fetch_water')
+    def test_get_landcover_offline(self, mock_water, mock_biotopes):
+        """Test that get_landcover answers from the raster without calling Overpass."""
+        with patch('app.shroomloc.landcover_raster', self.raster), \
+             patch('app.shroomloc.LANDCOVER_OFFLINE', True):
+            self.assertEqual(asyncio.run(get_landcover(0.5, 2.5)), {"water": False, "biotopes": ["prairie"]})
+            self.assertEqual(asyncio.run(get_landcover(40.0, 2.5)), {"water": False, "biotopes": []})
+        mock_water.assert_not_called()
+        mock_biotopes.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
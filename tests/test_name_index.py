@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.name_index import NameIndex, normalize
+
+SPECIES = [
+    {"scientific_name": "Boletus edulis", "common_name": "Cèpe de Bordeaux"},
+    {"scientific_name": "Boletus aereus", "common_name": "Cèpe bronzé"},
+    {"scientific_name": "Cantharellus cibarius", "common_name": "Girolle"},
+    {"scientific_name": "Girolla", "common_name": "Boletus edulis"},
+]
+
+
+class TestNameIndex(unittest.TestCase):
+    """Unit tests for the species name index."""
+
+    def setUp(self):
+        self.index = NameIndex(SPECIES)
+
+    def test_normalize(self):
+        """Test case folding, accent stripping and whitespace collapsing."""
+        self.assertEqual(normalize("  Cèpe de  BORDEAUX "), "cepe de bordeaux")
+
+    def test_lookup(self):
+        """Test exact lookups by scientific or common name, scientific names first."""
+        self.assertIs(self.index.lookup("cepe de bordeaux"), SPECIES[0])
+        self.assertIs(self.index.lookup("GIROLLE"), SPECIES[2])
+        self.assertIs(self.index.lookup("Boletus Edulis"), SPECIES[0])
+        self.assertIsNone(self.index.lookup("cepe"))
+
+    def test_prefix(self):
+        """Test that name starts come before inner words and each species appears once."""
+        self.assertEqual(
+            [m["name"] for m in self.index.prefix("cep")],
+            ["Cèpe bronzé", "Cèpe de Bordeaux"]
+        )
+        self.assertEqual([m["scientific_name"] for m in self.index.prefix("bord")], ["Boletus edulis"])
+        self.assertEqual(self.index.prefix("bord")[0]["match"], "common_name")
+        self.assertEqual(len(self.index.prefix("bol", limit=2)), 2)
+        self.assertEqual(self.index.prefix("   "), [])
+        self.assertEqual(self.index.prefix("xyz"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import asyncio
+import sys
+import os
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.recipe_pool import RecipePool, format_meal
+from app.shroomloc import get_mushroom_recipe
+
+MEAL = {
+    "strMeal": "Mushroom soup",
+    "strCategory": "Starter",
+    "strArea": "French",
+    "strInstructions": "Cook.",
+    "strMealThumb": "http://example.com/soup.jpg",
+    "strIngredient1": "Mushrooms",
+    "strMeasure1": "200g ",
+    "strIngredient2": "Salt",
+    "strMeasure2": None,
+    "strIngredient3": "",
+}
+
+
+class TestRecipePool(unittest.TestCase):
+    """Unit tests for the local recipe pool."""
+
+    def test_format_meal(self):
+        """Test that a TheMealDB detail is converted to the compact recipe dict."""
+        recipe = format_meal(MEAL)
+        self.assertEqual(recipe["name"], "Mushroom soup")
+        self.assertEqual(recipe["ingredients"], ["200g Mushrooms", "Salt"])
+        self.assertEqual(recipe["source"], "https://www.themealdb.com")
+
+    @patch('app.recipe_pool.fetch_meal')
+    @patch('app.recipe_pool.fetch_mushroom_meal_ids')
+    def test_refresh_and_pick(self, mock_ids, mock_meal):
+        """Test that a refresh fills the pool and a failed one keeps it."""
+        mock_ids.return_value = ["1", "2", "3"]
+        mock_meal.side_effect = lambda meal_id: None if meal_id == "3" else format_meal(MEAL)
+
+        pool = RecipePool(refresh_interval=60, concurrency=2)
+        self.assertIsNone(pool.pick())
+        self.assertEqual(asyncio.run(pool.refresh()), 2)
+        self.assertEqual(pool.pick()["name"], "Mushroom soup")
+
+        mock_ids.return_value = []
+        self.assertEqual(asyncio.run(pool.refresh()), 2)
+
+    @patch('app.shroomloc.fetch_mushroom_meal_ids')
+    def test_get_mushroom_recipe_uses_pool(self, mock_ids):
+        """Test that a filled pool answers without calling TheMealDB."""
+        pool = RecipePool()
+        pool.recipes = [format_meal(MEAL)]
+        with patch('app.shroomloc.recipe_pool', pool):
+            recipe = asyncio.run(get_mushroom_recipe())
+        self.assertEqual(recipe["name"], "Mushroom soup")
+        mock_ids.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+import asyncio
+import time
+import sys
+import os
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.resilience import CircuitBreaker, hedged
+from app.shroomloc import fetch_weather, weather_breakers
+
+
+def answer(value, delay=0.0, calls=None):
+    """Returns a coroutine function answering `value` (or raising it) after `delay` seconds."""
+    async def fetch():
+        if calls is not None:
+            calls.append(value)
+        await asyncio.sleep(delay)
+        if isinstance(value, Exception):
+            raise value
+        return value
+    return fetch
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Unit tests for the circuit breaker."""
+
+    def test_opens_after_threshold(self):
+        """Test that consecutive failures open the circuit and a success resets the count."""
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.stats()["skipped"], 1)
+
+    def test_half_open_trial(self):
+        """Test that a single trial call is let through after the cooldown."""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+
+class TestHedged(unittest.TestCase):
+    """Unit tests for hedged requests."""
+
+    def test_fast_first_provider(self):
+        """Test that a fast first answer never starts the second provider."""
+        calls = []
+        attempts = [
+            (CircuitBreaker("a"), answer("a", 0.01, calls)),
+            (CircuitBreaker("b"), answer("b", 0.0, calls)),
+        ]
+        self.assertEqual(asyncio.run(hedged(attempts, 0.2)), "a")
+        self.assertEqual(calls, ["a"])
+
+    def test_slow_first_provider_is_hedged(self):
+        """Test that the second provider answers when the first one is still silent after the delay."""
+        attempts = [
+            (CircuitBreaker("a"), answer("a", 2.0)),
+            (CircuitBreaker("b"), answer("b", 0.01)),
+        ]
+        start = time.perf_counter()
+        self.assertEqual(asyncio.run(hedged(attempts, 0.05)), "b")
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_failure_starts_next_at_once(self):
+        """Test that a failure starts the next provider without waiting for the delay."""
+        breaker = CircuitBreaker("a", failure_threshold=1)
+        attempts = [
+            (breaker, answer(ValueError("boom"))),
+            (CircuitBreaker("b"), answer("b")),
+        ]
+        start = time.perf_counter()
+        self.assertEqual(asyncio.run(hedged(attempts, 5.0)), "b")
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(breaker.state, "open")
+
+    def test_open_circuit_is_skipped(self):
+        """Test that a provider with an open circuit is not called."""
+        breaker = CircuitBreaker("a", failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        calls = []
+        attempts = [
+            (breaker, answer("a", 0.0, calls)),
+            (CircuitBreaker("b"), answer(None, 0.0, calls)),
+        ]
+        self.assertIsNone(asyncio.run(hedged(attempts, 0.05)))
+        self.assertEqual(calls, [None])
+
+    def test_unused_half_open_provider_keeps_its_trial(self):
+        """Test that a half-open secondary is not locked out while a healthy primary answers."""
+        primary = CircuitBreaker("a", failure_threshold=1, reset_timeout=0.05)
+        secondary = CircuitBreaker("b", failure_threshold=1, reset_timeout=0.05)
+        primary.record_failure()
+        secondary.record_failure()
+        time.sleep(0.06)
+
+        for _ in range(3):
+            attempts = [(primary, answer("a")), (secondary, answer("b"))]
+            self.assertEqual(asyncio.run(hedged(attempts, 0.2)), "a")
+        self.assertEqual(secondary.stats(), {"state": "half_open", "consecutive_failures": 1, "skipped": 0})
+
+        attempts = [(primary, answer(ValueError("boom"))), (secondary, answer("b"))]
+        self.assertEqual(asyncio.run(hedged(attempts, 0.2)), "b")
+        self.assertEqual(secondary.state, "closed")
+
+
+class TestFetchWeather(unittest.TestCase):
+    """Unit tests for the weather provider layer."""
+
+    def setUp(self):
+        for breaker in weather_breakers.values():
+            breaker.record_success()
+
+    tearDown = setUp
+
+    def test_hedged_weather(self):
+        """Test that Open-Meteo answers while wttr.in is slow."""
+        async def slow_wttr(lat, lon):
+            await asyncio.sleep(2.0)
+            return 20.0, 50.0
+
+        async def open_meteo(lat, lon):
+            return 12.0, 90.0
+
+        with patch('app.shroomloc.WEATHER_PROVIDERS', [("wttr", slow_wttr), ("open_meteo", open_meteo)]), \
+             patch('app.shroomloc.WEATHER_HEDGE_DELAY', 0.05):
+            start = time.perf_counter()
+            self.assertEqual(asyncio.run(fetch_weather(48.0, 0.3)), (12.0, 90.0))
+            self.assertLess(time.perf_counter() - start, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
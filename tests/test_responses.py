@@ -0,0 +1,81 @@
+import unittest
+import gzip
+import json
+import sys
+import os
+
+from fastapi import Request
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.responses import FastJSONResponse, PrecomputedJSON, accepted_encodings
+
+DATA = [{"scientific_name": "Amanita muscaria", "common_name": "Amanite tue-mouches"}] * 20
+
+
+def request(**headers):
+    """Builds a bare GET request with the given headers."""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+class TestFastJSONResponse(unittest.TestCase):
+    """Unit tests for the orjson response class."""
+
+    def test_body(self):
+        """Test that the body is compact UTF-8 JSON."""
+        response = FastJSONResponse({"common_name": "Cèpe", "recipe": None})
+        self.assertEqual(response.body, '{"common_name":"Cèpe","recipe":null}'.encode("utf-8"))
+        self.assertEqual(response.headers["content-type"], "application/json")
+
+
+class TestPrecomputedJSON(unittest.TestCase):
+    """Unit tests for the precomputed /mushrooms/all response."""
+
+    def setUp(self):
+        self.payload = PrecomputedJSON(DATA)
+
+    def test_accepted_encodings(self):
+        """Test that codings are parsed and q=0 ones excluded."""
+        self.assertEqual(accepted_encodings(request(accept_encoding="gzip;q=0.8, br;q=0, deflate")), {"gzip", "deflate"})
+
+    def test_identity_and_gzip(self):
+        """Test that the gzip variant is sent when accepted and decodes to the same document."""
+        plain = self.payload.response(request())
+        self.assertEqual(json.loads(plain.body), DATA)
+        self.assertNotIn("content-encoding", plain.headers)
+
+        compressed = self.payload.response(request(accept_encoding="gzip"))
+        self.assertEqual(compressed.headers["content-encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(compressed.body)), DATA)
+        self.assertLess(len(compressed.body), len(plain.body))
+        self.assertNotEqual(compressed.headers["etag"], plain.headers["etag"])
+
+    def test_if_none_match(self):
+        """Test that a current ETag gets an empty 304 and a stale one the full body."""
+        etag = self.payload.response(request()).headers["etag"]
+        response = self.payload.response(request(if_none_match=etag))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.body, b"")
+
+        response = self.payload.response(request(if_none_match='"outdated"'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match_weak_comparison(self):
+        """Test that a weak validator sent back by a proxy still matches."""
+        etag = self.payload.response(request(accept_encoding="gzip")).headers["etag"]
+        response = self.payload.response(request(accept_encoding="gzip", if_none_match=f'"outdated", W/{etag}'))
+        self.assertEqual(response.status_code, 304)
+
+    def test_version_follows_content(self):
+        """Test that the ETag changes with the dataset and is stable otherwise."""
+        self.assertEqual(PrecomputedJSON(DATA).version, self.payload.version)
+        self.assertNotEqual(PrecomputedJSON(DATA[:1]).version, self.payload.version)
+
+
+if __name__ == "__main__":
+    unittest.main()
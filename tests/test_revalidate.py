@@ -0,0 +1,62 @@
+import unittest
+import asyncio
+import sys
+import os
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.cache import TTLCache
+from app.revalidate import Revalidator
+from app.singleflight import SingleFlight
+
+
+class TestRevalidator(unittest.TestCase):
+    """Unit tests for background and proactive refreshes."""
+
+    def setUp(self):
+        self.cache = TTLCache(maxsize=100, ttl=60)
+        self.calls = []
+
+    def refresher(self, key):
+        async def refresh():
+            self.calls.append(key)
+            self.cache.set(key, key.upper())
+        return refresh
+
+    def touch(self, revalidator, key, times=1):
+        for _ in range(times):
+            revalidator.touch(key, self.refresher(key), lambda key=key: self.cache.expires_in(key))
+
+    def test_refresh_hot_keys_close_to_expiry(self):
+        """Test that only the hottest keys expiring soon are refreshed, and counts decay."""
+        revalidator = Revalidator(SingleFlight(), top=2, ahead=10)
+        self.cache.set("hot", "old", ttl=5)
+        self.cache.set("warm", "old", ttl=5)
+        self.cache.set("later", "old", ttl=600)
+        self.touch(revalidator, "hot", 4)
+        self.touch(revalidator, "later", 3)
+        self.touch(revalidator, "warm", 1)
+
+        self.assertEqual(asyncio.run(revalidator.refresh_hot()), 1)
+        self.assertEqual(self.calls, ["hot"])
+        self.assertEqual(self.cache.get("hot"), "HOT")
+        self.assertEqual(dict(revalidator.requests), {"hot": 2, "later": 1})
+        self.assertNotIn("warm", revalidator.jobs)
+
+    def test_revalidate_in_background(self):
+        """Test that revalidate() returns at once and refreshes the entry."""
+        revalidator = Revalidator(SingleFlight())
+
+        async def main():
+            revalidator.revalidate("k", self.refresher("k"))
+            before = self.cache.get("k")
+            await asyncio.sleep(0.01)
+            return before, self.cache.get("k")
+
+        self.assertEqual(asyncio.run(main()), (None, "K"))
+        self.assertEqual(revalidator.stats()["revalidated"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
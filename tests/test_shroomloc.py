@@ -1,4 +1,6 @@
 import unittest
+import asyncio
+import time
 import sys
 import os
 from unittest.mock import patch, MagicMock
@@ -6,19 +8,21 @@ from unittest.mock import patch, MagicMock
 # Ajouter le répertoire parent au path pour permettre l'import d'app
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from app.shroomloc import get_mushrooms
+from app.shroomloc import get_mushrooms, get_mushrooms_batch, enrich_mushrooms, stream_mushrooms, classify_water, classify_biotopes
 
 class TestGetMushrooms(unittest.TestCase):
     """Unit tests for the get_mushrooms function."""
 
+    @patch('app.shroomloc.get_landcover')
     @patch('app.shroomloc.get_weather')
     @patch('app.shroomloc.get_season')
-    @patch('app.shroomloc.refine_biotope_osm')
+    @patch('app.shroomloc.pick_biotope')
     @patch('app.shroomloc.determine_biotope')
     @patch('app.shroomloc.filter_mushrooms')
     @patch('app.shroomloc.get_mushroom_image')
-    def test_get_mushrooms_returns_list(self, mock_image, mock_filter, mock_biotope, mock_osm, mock_season, mock_weather):
+    def test_get_mushrooms_returns_list(self, mock_image, mock_filter, mock_biotope, mock_osm, mock_season, mock_weather, mock_landcover):
         """Test that get_mushrooms returns a list."""
+        mock_landcover.return_value = {"water": False, "biotopes": []}
         mock_weather.return_value = (15, 65)
         mock_season.return_value = "autumn"
         mock_osm.return_value = "forest"
@@ -35,17 +39,19 @@ class TestGetMushrooms(unittest.TestCase):
         
         lat = 47.989921
         lon = 0.29065708
-        result = get_mushrooms(lat, lon, "./app/mushrooms_cleaned.json")
+        result = asyncio.run(get_mushrooms(lat, lon, "./app/mushrooms_cleaned.json"))
         self.assertIsInstance(result, list)
 
+    @patch('app.shroomloc.get_landcover')
     @patch('app.shroomloc.get_weather')
     @patch('app.shroomloc.get_season')
-    @patch('app.shroomloc.refine_biotope_osm')
+    @patch('app.shroomloc.pick_biotope')
     @patch('app.shroomloc.determine_biotope')
     @patch('app.shroomloc.filter_mushrooms')
     @patch('app.shroomloc.get_mushroom_image')
-    def test_get_mushrooms_items_structure(self, mock_image, mock_filter, mock_biotope, mock_osm, mock_season, mock_weather):
+    def test_get_mushrooms_items_structure(self, mock_image, mock_filter, mock_biotope, mock_osm, mock_season, mock_weather, mock_landcover):
         """Test that each mushroom has the expected structure."""
+        mock_landcover.return_value = {"water": False, "biotopes": []}
         mock_weather.return_value = (15, 65)
         mock_season.return_value = "autumn"
         mock_osm.return_value = "forest"
@@ -62,7 +68,7 @@ class TestGetMushrooms(unittest.TestCase):
         
         lat = 47.989921
         lon = 0.29065708
-        result = get_mushrooms(lat, lon, "./app/mushrooms_cleaned.json")
+        result = asyncio.run(get_mushrooms(lat, lon, "./app/mushrooms_cleaned.json"))
         self.assertGreater(len(result), 0)
         mushroom = result[0]
         self.assertIn("scientific_name", mushroom)
@@ -70,14 +76,16 @@ class TestGetMushrooms(unittest.TestCase):
         self.assertIn("edibility", mushroom)
         self.assertIn("image_url", mushroom)
 
+    @patch('app.shroomloc.get_landcover')
     @patch('app.shroomloc.get_weather')
     @patch('app.shroomloc.get_season')
-    @patch('app.shroomloc.refine_biotope_osm')
+    @patch('app.shroomloc.pick_biotope')
     @patch('app.shroomloc.determine_biotope')
     @patch('app.shroomloc.filter_mushrooms')
     @patch('app.shroomloc.get_mushroom_image')
-    def test_get_mushrooms_edibility_values(self, mock_image, mock_filter, mock_biotope, mock_osm, mock_season, mock_weather):
+    def test_get_mushrooms_edibility_values(self, mock_image, mock_filter, mock_biotope, mock_osm, mock_season, mock_weather, mock_landcover):
         """Test that the edibility field has valid values."""
+        mock_landcover.return_value = {"water": False, "biotopes": []}
         mock_weather.return_value = (15, 65)
         mock_season.return_value = "autumn"
         mock_osm.return_value = "forest"
@@ -94,10 +102,204 @@ class TestGetMushrooms(unittest.TestCase):
         
         lat = 47.989921
         lon = 0.29065708
-        result = get_mushrooms(lat, lon, "./app/mushrooms_cleaned.json")
+        result = asyncio.run(get_mushrooms(lat, lon, "./app/mushrooms_cleaned.json"))
         allowed = {"edible", "poisonous", "toxic", "inedible", "medicinal", "unknown"}
         for mushroom in result:
             self.assertIn(mushroom["edibility"], allowed)
 
+    @patch('app.shroomloc.get_mushroom_recipe')
+    @patch('app.shroomloc.get_mushroom_image')
+    def test_get_mushrooms_fetches_upstreams_concurrently(self, mock_image, mock_recipe):
+        """Test that the land cover and weather lookups overlap instead of running one after another."""
+        def slow(value):
+            async def upstream(lat, lon):
+                await asyncio.sleep(0.2)
+                return value
+            return upstream
+
+        mock_image.return_value = None
+        mock_recipe.return_value = None
+        with patch('app.shroomloc.get_landcover', new=slow({"water": False, "biotopes": ["prairie"]})), \
+             patch('app.shroomloc.get_weather', new=slow((15, 65))):
+            start = time.perf_counter()
+            result = asyncio.run(get_mushrooms(47.989921, 0.29065708, "./app/mushrooms_cleaned.json"))
+            elapsed = time.perf_counter() - start
+
+        self.assertIsInstance(result, list)
+        self.assertLess(elapsed, 0.35)
+
+
+class TestGetMushroomsBatch(unittest.TestCase):
+    """Unit tests for the batch get_mushrooms_batch function."""
+
+    @patch('app.shroomloc.get_mushroom_recipe')
+    @patch('app.shroomloc.get_mushroom_image')
+    @patch('app.shroomloc.get_season')
+    @patch('app.shroomloc.get_landcover')
+    @patch('app.shroomloc.get_weather')
+    def test_deduplicates_and_matches_single_calls(self, mock_weather, mock_landcover, mock_season, mock_image, mock_recipe):
+        """Test that upstreams are called once per cell and results equal per-point get_mushrooms."""
+        mock_weather.side_effect = lambda lat, lon: (18, 85) if lat < 47 else (12, 90)
+        mock_landcover.side_effect = lambda lat, lon: (
+            {"water": True, "biotopes": []} if lon > 1 else {"water": False, "biotopes": ["prairie"]}
+        )
+        mock_season.return_value = "autumn"
+        mock_image.side_effect = lambda name: f"http://example.com/{name}.jpg"
+        mock_recipe.return_value = None
+
+        points = [(47.98991, 0.29065), (47.98992, 0.29066), (46.5, 0.5), (47.98991, 0.29065), (47.98, 1.5)]
+        result = asyncio.run(get_mushrooms_batch(points, "./app/mushrooms_cleaned.json"))
+
+        self.assertEqual(mock_weather.call_count, 3)
+        self.assertEqual(mock_landcover.call_count, 3)
+        self.assertEqual([(r["latitude"], r["longitude"]) for r in result], points)
+        self.assertEqual(mock_image.call_count, len({m["scientific_name"] for r in result for m in r["mushrooms"]}))
+
+        for (lat, lon), row in zip(points, result):
+            expected = asyncio.run(get_mushrooms(lat, lon, "./app/mushrooms_cleaned.json"))
+            self.assertEqual(row["mushrooms"], expected)
+
+
+class TestLandcover(unittest.TestCase):
+    """Unit tests for the OSM land cover classification."""
+
+    def test_classify_water(self):
+        """Test the water verdict rules."""
+        lake = {"tags": {"natural": "water"}}
+        forest = {"tags": {"landuse": "forest"}}
+        self.assertTrue(classify_water([]))
+        self.assertTrue(classify_water([lake]))
+        self.assertFalse(classify_water([lake, forest]))
+        self.assertFalse(classify_water([forest]))
+
+    def test_classify_biotopes(self):
+        """Test that OSM tags map to biotope candidates."""
+        elements = [
+            {"type": "near", "tags": {"natural": "wood"}},
+            {"type": "near", "tags": {"landuse": "pasture"}},
+            {"type": "near", "tags": {"landuse": "commercial"}},
+            {"type": "near", "tags": {"landuse": "farmland"}},
+        ]
+        self.assertEqual(classify_biotopes(elements), ["forêt", "prairie", "zones urbaines"])
+
+
+class TestEnrichMushrooms(unittest.TestCase):
+    """Unit tests for the parallel image and recipe enrichment."""
+
+    CHAMPIGNONS = [
+        {
+            "scientific_name": f"Species {i}",
+            "common_name": f"Espèce {i}",
+            "edibility": "edible" if i % 2 else "inedible",
+            "toxicity": "none",
+            "psychoactive": False
+        }
+        for i in range(6)
+    ]
+
+    def test_order_and_fallbacks(self):
+        """Test that results keep their order and slow lookups fall back to None."""
+        async def image(name):
+            index = int(name.split()[-1])
+            await asyncio.sleep(0.5 if index == 2 else 0.01 * (6 - index))
+            return f"http://example.com/{index}.jpg"
+
+        async def recipe():
+            raise RuntimeError("TheMealDB down")
+
+        with patch('app.shroomloc.get_mushroom_image', new=image), \
+             patch('app.shroomloc.get_mushroom_recipe', new=recipe):
+            result = asyncio.run(enrich_mushrooms(self.CHAMPIGNONS, concurrency=4, timeout=0.2))
+
+        self.assertEqual([m["scientific_name"] for m in result], [c["scientific_name"] for c in self.CHAMPIGNONS])
+        self.assertIsNone(result[2]["image_url"])
+        self.assertEqual(result[5]["image_url"], "http://example.com/5.jpg")
+        self.assertTrue(all(m["recipe"] is None for m in result))
+
+    def test_concurrency_limit(self):
+        """Test that no more than `concurrency` upstream calls run at once."""
+        in_flight = 0
+        peak = 0
+
+        async def image(name):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return None
+
+        async def recipe():
+            return await image("recipe")
+
+        with patch('app.shroomloc.get_mushroom_image', new=image), \
+             patch('app.shroomloc.get_mushroom_recipe', new=recipe):
+            asyncio.run(enrich_mushrooms(self.CHAMPIGNONS, concurrency=2, timeout=1))
+
+        self.assertLessEqual(peak, 2)
+
+    @patch('app.shroomloc.get_mushroom_recipe')
+    @patch('app.shroomloc.get_mushroom_image')
+    def test_include_and_fields(self, mock_image, mock_recipe):
+        """Test that only included and requested enrichments are fetched and fields are projected."""
+        mock_image.return_value = "http://example.com/img.jpg"
+
+        result = asyncio.run(enrich_mushrooms(self.CHAMPIGNONS, fields=["scientific_name", "edibility"]))
+        self.assertEqual(result[0], {"scientific_name": "Species 0", "edibility": "inedible"})
+        mock_image.assert_not_called()
+        mock_recipe.assert_not_called()
+
+        result = asyncio.run(enrich_mushrooms(self.CHAMPIGNONS, include=["image"]))
+        self.assertEqual(result[1]["image_url"], "http://example.com/img.jpg")
+        self.assertNotIn("recipe", result[1])
+        self.assertEqual(mock_image.call_count, len(self.CHAMPIGNONS))
+        mock_recipe.assert_not_called()
+
+
+class TestStreamMushrooms(unittest.TestCase):
+    """Unit tests for the streaming variant of get_mushrooms."""
+
+    CHAMPIGNONS = TestEnrichMushrooms.CHAMPIGNONS[:3]
+
+    @patch('app.shroomloc.find_mushrooms')
+    def test_records_in_completion_order(self, mock_find):
+        """Test that each record is emitted when its enrichment completes, with its list index."""
+        mock_find.return_value = self.CHAMPIGNONS
+        delays = {0: 0.3, 1: 0.01, 2: 0.1}
+
+        async def image(name):
+            index = int(name.split()[-1])
+            await asyncio.sleep(delays[index])
+            return f"http://example.com/{index}.jpg"
+
+        async def main():
+            start = time.perf_counter()
+            events = []
+            async for index, record in stream_mushrooms(48.0, 0.3, include=["image"]):
+                events.append((index, record["image_url"], time.perf_counter() - start))
+            return events
+
+        with patch('app.shroomloc.get_mushroom_image', new=image):
+            events = asyncio.run(main())
+
+        self.assertEqual([e[0] for e in events], [1, 2, 0])
+        self.assertEqual(events[0][1], "http://example.com/1.jpg")
+        self.assertLess(events[0][2], 0.1)
+
+    @patch('app.shroomloc.get_mushroom_image')
+    @patch('app.shroomloc.find_mushrooms')
+    def test_without_enrichment(self, mock_find, mock_image):
+        """Test that records are emitted in order without any upstream call when nothing is included."""
+        mock_find.return_value = self.CHAMPIGNONS
+
+        async def main():
+            return [item async for item in stream_mushrooms(48.0, 0.3, include=[])]
+
+        events = asyncio.run(main())
+        self.assertEqual([index for index, _ in events], [0, 1, 2])
+        self.assertNotIn("image_url", events[0][1])
+        mock_image.assert_not_called()
+
+
 if __name__ == "__main__":
     unittest.main()
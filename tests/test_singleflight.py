@@ -0,0 +1,115 @@
+import unittest
+import asyncio
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.singleflight import SingleFlight
+from app.cache import PersistentCache
+from app.shroomloc import get_weather, get_mushroom_image, weather_cache
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Unit tests for request coalescing."""
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Test that concurrent calls with the same key run the computation once."""
+        flights = SingleFlight()
+        calls = []
+
+        async def compute(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key.upper()
+
+        async def main():
+            return await asyncio.gather(
+                *(flights.do(key, lambda key=key: compute(key)) for key in ["a", "a", "a", "b"])
+            )
+
+        self.assertEqual(asyncio.run(main()), ["A", "A", "A", "B"])
+        self.assertEqual(calls, ["a", "b"])
+        self.assertEqual(flights.stats(), {"in_flight": 0, "started": 2, "coalesced": 2})
+
+    def test_exception_is_shared_and_forgotten(self):
+        """Test that an error reaches every waiter and the next call starts afresh."""
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def main():
+            return await asyncio.gather(flights.do("k", fail), flights.do("k", fail), return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(asyncio.run(flights.do("k", lambda: asyncio.sleep(0, result=1))), 1)
+
+    def test_cancelled_caller_keeps_computation(self):
+        """Test that cancelling one waiter does not cancel the shared computation."""
+        flights = SingleFlight()
+
+        async def main():
+            first = asyncio.ensure_future(flights.do("k", lambda: asyncio.sleep(0.02, result="ok")))
+            second = asyncio.ensure_future(flights.do("k", lambda: asyncio.sleep(0.02, result="other")))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), "ok")
+
+
+class TestCoalescedLookups(unittest.TestCase):
+    """Unit tests for coalesced upstream lookups in shroomloc."""
+
+    def setUp(self):
+        weather_cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.image_cache = PersistentCache("image_urls", ttl=60, path=os.path.join(self.tmp.name, "cache.db"))
+
+    def tearDown(self):
+        weather_cache.clear()
+        self.image_cache.close()
+        self.tmp.cleanup()
+
+    def test_weather_fetched_once_per_cell(self):
+        """Test that concurrent misses on one weather cell query the providers once."""
+        calls = []
+
+        async def fetch(lat, lon):
+            calls.append((lat, lon))
+            await asyncio.sleep(0.01)
+            return 15.0, 70.0
+
+        async def main():
+            return await asyncio.gather(*(get_weather(48.0 + i * 0.001, 0.3) for i in range(10)))
+
+        with patch('app.shroomloc.fetch_weather', new=fetch):
+            self.assertEqual(asyncio.run(main()), [(15.0, 70.0)] * 10)
+        self.assertEqual(len(calls), 1)
+
+    def test_image_fetched_once_per_species(self):
+        """Test that concurrent misses on one species call iNaturalist once."""
+        calls = []
+
+        async def fetch(name):
+            calls.append(name)
+            await asyncio.sleep(0.01)
+            return "http://example.com/amanita.jpg"
+
+        async def main():
+            return await asyncio.gather(*(get_mushroom_image("Amanita muscaria") for _ in range(5)))
+
+        with patch('app.shroomloc.fetch_mushroom_image', new=fetch), \
+             patch('app.shroomloc.image_cache', self.image_cache):
+            self.assertEqual(set(asyncio.run(main())), {"http://example.com/amanita.jpg"})
+        self.assertEqual(calls, ["Amanita muscaria"])
+
+
+if __name__ == "__main__":
+    unittest.main()
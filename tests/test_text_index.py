@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.text_index import TextIndex, stem, tokenize
+
+SPECIES = [
+    {
+        "scientific_name": "Pleurotus ostreatus", "common_name": "Pleurote en huître",
+        "habitat": ["bois mort", "forêt de feuillus"], "notes": "Comestible, pousse en touffes.",
+    },
+    {
+        "scientific_name": "Hypholoma fasciculare", "common_name": "Hypholome en touffe",
+        "habitat": ["bois mort"], "notes": "Toxique, très amer.",
+    },
+    {
+        "scientific_name": "Boletus edulis", "common_name": "Cèpe de Bordeaux",
+        "habitat": ["forêt de conifères"], "notes": "Excellent comestible.",
+    },
+    {
+        "scientific_name": "Agaricus campestris", "common_name": "Rosé des prés",
+        "habitat": ["prairies"], "notes": "Comestible, à ne pas confondre avec les amanites.",
+    },
+]
+
+
+class TestTokenize(unittest.TestCase):
+    """Unit tests for the French tokenizer."""
+
+    def test_tokenize(self):
+        """Test accent stripping, elision and stopword removal, and plural stemming."""
+        self.assertEqual(
+            tokenize("L'Amanite pousse dans les Forêts, sous les chapeaux végétaux"),
+            ["amanite", "pousse", "foret", "chapeau", "vegetal"]
+        )
+
+    def test_stem(self):
+        """Test that short words are left untouched."""
+        self.assertEqual(stem("bois"), "boi")
+        self.assertEqual(stem("eaux"), "eau")
+        self.assertEqual(stem("pas"), "pas")
+
+
+class TestTextIndex(unittest.TestCase):
+    """Unit tests for the full-text index."""
+
+    def setUp(self):
+        self.index = TextIndex(SPECIES)
+
+    def test_ranking(self):
+        """Test that species matching every query term rank first."""
+        results = self.index.search("bois mort comestible")
+        self.assertEqual(results[0][1], SPECIES[0])
+        self.assertEqual(len(results), 4)
+        self.assertEqual([score for score, _ in results], sorted((score for score, _ in results), reverse=True))
+
+    def test_accents_and_plurals(self):
+        """Test that the query is normalized like the documents."""
+        self.assertEqual([champ for _, champ in self.index.search("PRAIRIE")], [SPECIES[3]])
+        self.assertEqual([champ for _, champ in self.index.search("huitres")], [SPECIES[0]])
+
+    def test_no_match(self):
+        """Test unknown terms and queries made only of stopwords."""
+        self.assertEqual(self.index.search("morille"), [])
+        self.assertEqual(self.index.search("de la"), [])
+
+    def test_limit(self):
+        """Test that the number of results is capped."""
+        self.assertEqual(len(self.index.search("comestible", limit=2)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
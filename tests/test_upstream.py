@@ -0,0 +1,64 @@
+import unittest
+import asyncio
+import sys
+import os
+from unittest.mock import patch
+
+import httpx
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.upstream import UpstreamClient
+
+UPSTREAMS = {"test": {"timeout": 1, "retries": 2}}
+
+
+class TestUpstreamClient(unittest.TestCase):
+    """Unit tests for the shared upstream HTTP client."""
+
+    @patch('app.upstream.UPSTREAM_BACKOFF', 0)
+    def test_retries_then_succeeds(self):
+        """Test that retryable statuses are retried and counted."""
+        statuses = iter([503, 429, 200])
+        transport = httpx.MockTransport(lambda request: httpx.Response(next(statuses), json={"ok": True}))
+        client = UpstreamClient(upstreams=UPSTREAMS, transport=transport)
+
+        async def scenario():
+            res = await client.get("test", "https://example.com/")
+            await client.aclose()
+            return res
+
+        res = asyncio.run(scenario())
+        self.assertEqual(res.status_code, 200)
+        counters = client.stats()["upstreams"]["test"]
+        self.assertEqual((counters["requests"], counters["retries"], counters["errors"]), (3, 2, 2))
+        self.assertEqual(counters["in_flight"], 0)
+
+    @patch('app.upstream.UPSTREAM_BACKOFF', 0)
+    def test_transport_errors_are_raised_after_retries(self):
+        """Test that the last transport error is raised once retries are exhausted."""
+        def fail(request):
+            raise httpx.ConnectError("unreachable", request=request)
+
+        client = UpstreamClient(upstreams=UPSTREAMS, transport=httpx.MockTransport(fail))
+        with self.assertRaises(httpx.ConnectError):
+            asyncio.run(client.get("test", "https://example.com/"))
+        self.assertEqual(client.stats()["upstreams"]["test"]["requests"], 3)
+
+    def test_client_is_reused_within_a_loop(self):
+        """Test that one pooled client is kept per upstream and event loop."""
+        client = UpstreamClient(upstreams=UPSTREAMS, transport=httpx.MockTransport(lambda r: httpx.Response(200)))
+
+        async def scenario():
+            await client.get("test", "https://example.com/a")
+            first = client._client("test")
+            await client.get("test", "https://example.com/b")
+            self.assertIs(client._client("test"), first)
+            await client.aclose()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
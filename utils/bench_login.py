@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.hashing import (
+    ARGON2_MEMORY_COST, ARGON2_PARALLELISM, ARGON2_TIME_COST, HashingPool, HashingPoolFull, hash_password
+)
+
+
+async def bench(workers, logins, max_pending):
+    """
+    Verifies `logins` passwords through a hashing pool of `workers` processes, all submitted at once.
+
+    Returns:
+        Dict[str, float]: Elapsed time, accepted and rejected verifications, logins per second.
+    """
+    hashed = hash_password("password123")
+    pool = HashingPool(workers=workers, max_pending=max_pending)
+    # Démarrage des processus hors mesure
+    await asyncio.gather(*(pool.verify("password123", hashed) for _ in range(workers)))
+
+    async def login():
+        try:
+            return await pool.verify("password123", hashed)
+        except HashingPoolFull:
+            return None
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+
+    accepted = sum(1 for r in results if r is not None)
+    return {
+        "elapsed": elapsed,
+        "accepted": accepted,
+        "rejected": logins - accepted,
+        "per_second": accepted / elapsed,
+    }
+
+
+def main():
+    """
+    Parse the command line and print the login throughput for 1..N hashing workers.
+    """
+    parser = argparse.ArgumentParser(description="Débit de /login (vérifications argon2 par seconde)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Nombre maximal de processus (défaut: nombre de cœurs)")
+    parser.add_argument("--logins", type=int, default=50, help="Vérifications par mesure (défaut: 50)")
+    parser.add_argument("--max-pending", type=int, default=None, help="Taille de la file (défaut: toutes les vérifications)")
+    args = parser.parse_args()
+
+    print(f"argon2: time_cost={ARGON2_TIME_COST}, memory_cost={ARGON2_MEMORY_COST} KiB, parallelism={ARGON2_PARALLELISM}")
+    for workers in range(1, args.workers + 1):
+        stats = asyncio.run(bench(workers, args.logins, args.max_pending or args.logins))
+        print(
+            f"{workers} processus: {stats['per_second']:.1f} logins/s "
+            f"({stats['per_second'] / workers:.1f} par cœur), "
+            f"{stats['accepted']} acceptés, {stats['rejected']} rejetés (503) en {stats['elapsed']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+import timeit
+from typing import Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.catalog import SpeciesCatalog
+from app.responses import FastJSONResponse
+
+DEFAULT_JSON = os.path.join(os.path.dirname(__file__), '..', 'app', 'mushrooms_cleaned.json')
+
+RECIPE = {
+    "name": "Mushroom soup",
+    "category": "Starter",
+    "area": "French",
+    "instructions": "Cook the mushrooms in butter, add the stock and simmer for 20 minutes.",
+    "ingredients": ["200g Mushrooms", "1 Onion", "500ml Stock", "Salt"],
+    "image": "https://www.themealdb.com/images/media/meals/soup.jpg",
+    "source": "https://www.themealdb.com",
+}
+
+
+def mushroom_records(catalog):
+    """
+    Returns /mushrooms records (as built by enrich_mushrooms) for every species of the catalog.
+    """
+    return [
+        {
+            "scientific_name": champ["scientific_name"],
+            "common_name": champ["common_name"],
+            "edibility": champ["edibility"],
+            "toxicity": champ["toxicity"],
+            "psychoactive": champ["psychoactive"],
+            "image_url": "https://inaturalist-open-data.s3.amazonaws.com/photos/1/medium.jpg",
+            "recipe": RECIPE if champ["edibility"] == "edible" else None,
+        }
+        for champ in catalog
+    ]
+
+
+def default_path(adapter, content):
+    """
+    What FastAPI does for an endpoint returning `content` with a response_model:
+    validate and copy through pydantic, jsonable_encoder, then the stdlib json module.
+    """
+    return JSONResponse(jsonable_encoder(adapter.dump_python(adapter.validate_python(content)))).body
+
+
+def fast_path(content):
+    return FastJSONResponse(content).body
+
+
+def main():
+    """
+    Parse the command line and print the serialization cost per response of both paths.
+    """
+    parser = argparse.ArgumentParser(description="Coût de sérialisation d'une réponse, avant et après orjson")
+    parser.add_argument("--json-path", default=DEFAULT_JSON, help="Chemin du JSON nettoyé des champignons")
+    parser.add_argument("--repeat", type=int, default=200, help="Réponses sérialisées par mesure (défaut: 200)")
+    args = parser.parse_args()
+
+    catalog = SpeciesCatalog.from_file(args.json_path)
+    cases = [
+        ("/mushrooms (20 espèces)", mushroom_records(catalog)[:20], TypeAdapter(List[Dict])),
+        ("/mushrooms/{name}", {**catalog.species[0], "image_url": None, "recipe": RECIPE}, TypeAdapter(Dict)),
+        (f"catalogue complet ({len(catalog)} espèces)", catalog.species, TypeAdapter(List[Dict])),
+    ]
+
+    for label, content, adapter in cases:
+        before = min(timeit.repeat(lambda: default_path(adapter, content), number=args.repeat, repeat=3)) / args.repeat
+        after = min(timeit.repeat(lambda: fast_path(content), number=args.repeat, repeat=3)) / args.repeat
+        print(f"{label}: {before * 1e6:.1f} µs -> {after * 1e6:.1f} µs par réponse (x{before / after:.1f})")
+
+
+if __name__ == "__main__":
+    main()
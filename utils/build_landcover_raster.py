@@ -0,0 +1,244 @@
+import argparse
+import bz2
+import gzip
+import json
+import math
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.landcover_raster import CLASS_NAMES, UNKNOWN, classify_tags, metadata_path
+
+DEFAULT_RESOLUTION = 0.0005
+
+
+def open_extract(path):
+    """
+    Opens an OSM XML extract, optionally compressed with gzip or bzip2.
+    PBF extracts are not supported: convert them first (e.g. `osmium cat region.osm.pbf -o region.osm`).
+    """
+    if path.endswith(".pbf"):
+        raise ValueError("PBF extracts are not supported, convert to .osm first (osmium cat ... -o region.osm)")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def _tags(element):
+    return {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+
+
+def read_extract(path):
+    """
+    Reads the land cover areas of an OSM XML extract.
+    Closed tagged ways and multipolygon relations are kept; the extract is read twice so that
+    only the member ways of land cover relations need to be held in memory besides the nodes.
+
+    Args:
+        path (str): Path to the .osm / .osm.gz / .osm.bz2 extract.
+
+    Returns:
+        Tuple[List[Tuple[int, List[List[Tuple[float, float]]]]], Optional[Dict]]:
+            Areas as (class code, rings of (lat, lon)), and the <bounds> of the extract if present.
+    """
+    # 1er passage : relations multipolygones d'occupation du sol
+    relations = []
+    member_ways = set()
+    with open_extract(path) as f:
+        for _, element in ET.iterparse(f):
+            if element.tag == "relation":
+                tags = _tags(element)
+                code = classify_tags(tags)
+                if tags.get("type") == "multipolygon" and code != UNKNOWN:
+                    ways = [
+                        int(m.get("ref")) for m in element.iter("member")
+                        if m.get("type") == "way"
+                    ]
+                    relations.append((code, ways))
+                    member_ways.update(ways)
+                element.clear()
+            elif element.tag in ("node", "way"):
+                element.clear()
+
+    # 2e passage : noeuds, chemins fermés étiquetés et chemins membres des relations
+    nodes = {}
+    way_refs = {}
+    areas = []
+    bounds = None
+    with open_extract(path) as f:
+        for _, element in ET.iterparse(f):
+            if element.tag == "bounds":
+                bounds = {k: float(element.get(k)) for k in ("minlat", "minlon", "maxlat", "maxlon")}
+            elif element.tag == "node":
+                nodes[int(element.get("id"))] = (float(element.get("lat")), float(element.get("lon")))
+                element.clear()
+            elif element.tag == "way":
+                way_id = int(element.get("id"))
+                refs = [int(nd.get("ref")) for nd in element.iter("nd")]
+                if way_id in member_ways:
+                    way_refs[way_id] = refs
+                code = classify_tags(_tags(element))
+                if code != UNKNOWN and len(refs) >= 4 and refs[0] == refs[-1]:
+                    ring = [nodes[ref] for ref in refs if ref in nodes]
+                    areas.append((code, [ring]))
+                element.clear()
+            elif element.tag == "relation":
+                element.clear()
+
+    for code, ways in relations:
+        rings = assemble_rings([way_refs[w] for w in ways if w in way_refs])
+        rings = [[nodes[ref] for ref in ring if ref in nodes] for ring in rings]
+        if rings:
+            areas.append((code, rings))
+
+    return areas, bounds
+
+
+def assemble_rings(ways):
+    """
+    Joins way segments sharing end nodes into closed rings. Segments that cannot be closed are dropped.
+
+    Args:
+        ways (List[List[int]]): Node ids of each member way.
+
+    Returns:
+        List[List[int]]: Closed rings of node ids.
+    """
+    pending = [list(w) for w in ways if len(w) >= 2]
+    rings = []
+    while pending:
+        ring = pending.pop()
+        while ring[0] != ring[-1]:
+            for k, way in enumerate(pending):
+                if way[0] == ring[-1]:
+                    ring.extend(way[1:])
+                elif way[-1] == ring[-1]:
+                    ring.extend(reversed(way[:-1]))
+                else:
+                    continue
+                pending.pop(k)
+                break
+            else:
+                ring = None
+                break
+        if ring is not None and len(ring) >= 4:
+            rings.append(ring)
+    return rings
+
+
+def ring_area(ring):
+    """
+    Returns the area of a ring in square degrees (shoelace formula).
+    """
+    lats = np.array([p[0] for p in ring])
+    lons = np.array([p[1] for p in ring])
+    return 0.5 * abs(np.dot(lons, np.roll(lats, 1)) - np.dot(lats, np.roll(lons, 1)))
+
+
+def fill_polygon(grid, rings, code, south, west, resolution):
+    """
+    Paints every cell whose center lies inside the polygon (even-odd rule, so inner rings are holes).
+
+    Args:
+        grid (np.ndarray): uint8 grid, row i covers latitudes from south + i * resolution.
+        rings (List[List[Tuple[float, float]]]): Rings of (lat, lon).
+        code (int): Class code to paint.
+    """
+    edges = []
+    for ring in rings:
+        pts = np.array(ring, dtype=np.float64)
+        ys = (pts[:, 0] - south) / resolution
+        xs = (pts[:, 1] - west) / resolution
+        edges.append(np.stack([xs[:-1], ys[:-1], xs[1:], ys[1:]], axis=1))
+    if not edges:
+        return
+    x0, y0, x1, y1 = np.concatenate(edges).T
+
+    rows, cols = grid.shape
+    first_row = max(0, int(math.floor(min(y0.min(), y1.min()))))
+    last_row = min(rows - 1, int(math.ceil(max(y0.max(), y1.max()))))
+
+    for i in range(first_row, last_row + 1):
+        y = i + 0.5
+        crossing = (y0 <= y) != (y1 <= y)
+        if not crossing.any():
+            continue
+        cx0, cy0, cx1, cy1 = x0[crossing], y0[crossing], x1[crossing], y1[crossing]
+        xs = np.sort(cx0 + (y - cy0) * (cx1 - cx0) / (cy1 - cy0))
+        for start, end in zip(xs[0::2], xs[1::2]):
+            # Cellules j dont le centre j + 0.5 est dans [start, end)
+            j0 = max(0, int(math.ceil(start - 0.5)))
+            j1 = min(cols, int(math.ceil(end - 0.5)))
+            if j0 < j1:
+                grid[i, j0:j1] = code
+
+
+def build_raster(areas, south, west, north, east, resolution, output):
+    """
+    Rasterizes land cover areas into a memory-mappable uint8 .npy grid and writes its JSON sidecar.
+    Larger areas are painted first so that smaller features (a lake in a forest, a park in a town)
+    end up on top.
+
+    Returns:
+        np.ndarray: The memory-mapped grid.
+    """
+    rows = max(1, int(math.ceil((north - south) / resolution)))
+    cols = max(1, int(math.ceil((east - west) / resolution)))
+    grid = np.lib.format.open_memmap(output, mode="w+", dtype=np.uint8, shape=(rows, cols))
+    grid[:] = UNKNOWN
+
+    for code, rings in sorted(areas, key=lambda area: -ring_area(area[1][0])):
+        fill_polygon(grid, rings, code, south, west, resolution)
+    grid.flush()
+
+    with open(metadata_path(output), "w", encoding="utf-8") as f:
+        json.dump({
+            "south": south,
+            "west": west,
+            "north": north,
+            "east": east,
+            "resolution": resolution,
+            "classes": {str(code): name for code, name in CLASS_NAMES.items()},
+        }, f, indent=2)
+
+    return grid
+
+
+def main():
+    """
+    Parse the command line, read the OSM extract and write the land cover raster.
+    """
+    parser = argparse.ArgumentParser(description="Construction d'une grille d'occupation du sol à partir d'un extrait OSM")
+    parser.add_argument("extract", help="Extrait OSM XML (.osm, .osm.gz, .osm.bz2)")
+    parser.add_argument("output", help="Fichier .npy de sortie (métadonnées dans <output>.json)")
+    parser.add_argument("--resolution", type=float, default=DEFAULT_RESOLUTION,
+                        help=f"Taille d'une cellule en degrés (défaut: {DEFAULT_RESOLUTION})")
+    parser.add_argument("--bbox", type=float, nargs=4, metavar=("SOUTH", "WEST", "NORTH", "EAST"),
+                        help="Emprise de la grille (défaut: <bounds> de l'extrait)")
+    args = parser.parse_args()
+
+    areas, bounds = read_extract(args.extract)
+    if args.bbox:
+        south, west, north, east = args.bbox
+    elif bounds:
+        south, west, north, east = bounds["minlat"], bounds["minlon"], bounds["maxlat"], bounds["maxlon"]
+    else:
+        parser.error("L'extrait n'a pas de <bounds>, utilisez --bbox")
+
+    grid = build_raster(areas, south, west, north, east, args.resolution, args.output)
+
+    print(f"{len(areas)} zones rasterisées dans une grille {grid.shape[0]}x{grid.shape[1]}")
+    counts = np.bincount(np.asarray(grid).ravel(), minlength=len(CLASS_NAMES))
+    for code, name in CLASS_NAMES.items():
+        print(f"- {name}: {counts[code]} cellules")
+
+
+if __name__ == "__main__":
+    main()
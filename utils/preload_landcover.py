@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import math
+import os
+import sys
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.shroomloc import (
+    LANDCOVER_CACHE_MAX, LANDCOVER_TILE_DEG, WATER_TILE_DEG,
+    biotope_cache, landcover_tile, load_biotopes, load_water, water_cache, water_tile,
+)
+
+
+def iter_tiles(south, west, north, east, size=LANDCOVER_TILE_DEG, tile_fn=landcover_tile):
+    """
+    Yields the (tile center, cache key) of every tile intersecting the bounding box.
+
+    Args:
+        south (float): Southern latitude of the box.
+        west (float): Western longitude of the box.
+        north (float): Northern latitude of the box.
+        east (float): Eastern longitude of the box.
+        size (float): Tile size in degrees.
+        tile_fn (Callable): Function returning the (tile center, cache key) of a point.
+    """
+    for i in range(math.floor(south / size), math.floor(north / size) + 1):
+        for j in range(math.floor(west / size), math.floor(east / size) + 1):
+            yield tile_fn((i + 0.5) * size, (j + 0.5) * size)
+
+
+def box_layers(south, west, north, east):
+    """
+    Returns the (name, tiles, cache, loader) of both land cover layers for the bounding box:
+    the coarse water tiles, then the biotope tiles.
+    """
+    return [
+        ("eau", list(iter_tiles(south, west, north, east, WATER_TILE_DEG, water_tile)), water_cache, load_water),
+        ("biotopes", list(iter_tiles(south, west, north, east)), biotope_cache, load_biotopes),
+    ]
+
+
+async def preload_landcover(south, west, north, east, delay, force=False):
+    """
+    Fills the persistent water and biotope caches for every tile of the bounding box.
+    Tiles already cached are skipped unless `force` is set. Overpass requests are sent one
+    at a time, `delay` seconds apart, to respect the public instance's usage policy.
+
+    Returns:
+        Dict[str, int]: Number of tiles fetched, skipped and failed.
+    """
+    stats = {"fetched": 0, "skipped": 0, "failed": 0}
+
+    for layer, tiles, cache, load in box_layers(south, west, north, east):
+        for tile, key in tiles:
+            if not force and cache.get(key)[0]:
+                stats["skipped"] += 1
+                continue
+
+            try:
+                value = await load(tile, key)
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"{layer} {key}: échec ({e})")
+            else:
+                stats["fetched"] += 1
+                print(f"{layer} {key}: {value}")
+            await asyncio.sleep(delay)
+
+    return stats
+
+
+def main():
+    """
+    Parse the command line and preload the land cover cache for a bounding box.
+    """
+    parser = argparse.ArgumentParser(description="Préchargement du cache d'occupation du sol (Overpass)")
+    parser.add_argument("south", type=float, help="Latitude sud")
+    parser.add_argument("west", type=float, help="Longitude ouest")
+    parser.add_argument("north", type=float, help="Latitude nord")
+    parser.add_argument("east", type=float, help="Longitude est")
+    parser.add_argument("--delay", type=float, default=1.0, help="Pause entre deux requêtes (défaut: 1.0s)")
+    parser.add_argument("--force", action="store_true", help="Rafraîchir aussi les tuiles déjà en cache")
+    args = parser.parse_args()
+
+    if args.south > args.north or args.west > args.east:
+        parser.error("La boîte doit être donnée comme: sud ouest nord est")
+
+    water_tiles, biotope_tiles = (len(tiles) for _, tiles, _, _ in box_layers(args.south, args.west, args.north, args.east))
+    if biotope_tiles > LANDCOVER_CACHE_MAX:
+        parser.error(
+            f"{biotope_tiles} tuiles de biotope dépassent LANDCOVER_CACHE_MAX ({LANDCOVER_CACHE_MAX}) : "
+            "réduire la boîte ou construire une grille hors-ligne (build_landcover_raster.py)"
+        )
+    print(f"{water_tiles} tuiles d'eau de {WATER_TILE_DEG}° et {biotope_tiles} tuiles de biotope de {LANDCOVER_TILE_DEG}° à traiter")
+
+    stats = asyncio.run(preload_landcover(args.south, args.west, args.north, args.east, args.delay, args.force))
+    print(f"\nFetched: {stats['fetched']}, skipped: {stats['skipped']}, failed: {stats['failed']}")
+
+
+if __name__ == "__main__":
+    main()
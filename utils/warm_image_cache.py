@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import os
+import sys
+
+# Ajouter le répertoire parent au path pour permettre l'import d'app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.catalog import get_catalog
+from app.shroomloc import get_mushroom_image, image_cache
+
+DEFAULT_JSON_PATH = os.path.join(os.path.dirname(__file__), '..', 'app', 'mushrooms_cleaned.json')
+
+
+async def warm_image_cache(json_path, delay, force=False):
+    """
+    Prefetches the image URL of every species of the catalog into the persistent image cache.
+    Species already cached are skipped unless `force` is set.
+    Requests are sent one at a time, `delay` seconds apart, to stay polite with iNaturalist.
+
+    Args:
+        json_path (str): Path to the cleaned mushrooms JSON file.
+        delay (float): Pause between two iNaturalist requests, in seconds.
+        force (bool): Refetch species that are already cached.
+
+    Returns:
+        Dict[str, int]: Number of species fetched, skipped, found without photo, and failed.
+    """
+    stats = {"fetched": 0, "skipped": 0, "no_photo": 0, "failed": 0}
+
+    for champ in get_catalog(json_path):
+        name = champ["scientific_name"]
+        key = name.lower()
+
+        if force:
+            image_cache.delete(key)
+        elif image_cache.get(key)[0]:
+            stats["skipped"] += 1
+            continue
+
+        image_url = await get_mushroom_image(name)
+        if not image_cache.get(key)[0]:
+            # Les erreurs réseau ne sont pas mises en cache
+            stats["failed"] += 1
+            print(f"{name}: échec")
+        else:
+            stats["fetched"] += 1
+            if image_url is None:
+                stats["no_photo"] += 1
+            print(f"{name}: {image_url or 'aucune photo'}")
+        await asyncio.sleep(delay)
+
+    return stats
+
+
+def main():
+    """
+    Parse the command line and warm the image cache.
+    """
+    parser = argparse.ArgumentParser(description="Préchargement du cache d'images iNaturalist")
+    parser.add_argument("--json-path", default=DEFAULT_JSON_PATH, help="Fichier JSON du catalogue")
+    parser.add_argument("--delay", type=float, default=1.0, help="Pause entre deux requêtes (défaut: 1.0s)")
+    parser.add_argument("--force", action="store_true", help="Rafraîchir aussi les espèces déjà en cache")
+    args = parser.parse_args()
+
+    stats = asyncio.run(warm_image_cache(args.json_path, args.delay, args.force))
+    print(
+        f"\nFetched: {stats['fetched']}, skipped: {stats['skipped']}, "
+        f"without photo: {stats['no_photo']}, failed: {stats['failed']}"
+    )
+
+
+if __name__ == "__main__":
+    main()